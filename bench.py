@@ -0,0 +1,343 @@
+# bench.py
+"""
+Micro-benchmarks for pricing / leveling, transcript fetching and interaction dispatch.
+
+  python bench.py           comparisons plus the hot-path suite
+  python bench.py --save    run the suite and store it as the baseline (bench_baseline.json)
+  python bench.py --check   run the suite and exit 1 if anything is slower than baseline + tolerance
+
+Suite results are in calibration units: the cost of one call divided by the
+cost of calibration() timed right around it, median of ROUNDS rounds. Host
+speed and host-wide noise (shared CPUs, frequency scaling) mostly cancel out;
+re-save the baseline after changing Python version.
+"""
+import argparse
+import asyncio
+import bisect
+import json
+import random
+import statistics
+import sys
+import time
+import timeit
+import tracemalloc
+
+import discord
+
+from catalog import USD_SCALE, Catalog, current_catalog, fmt_pkr, fmt_usd, to_minor
+from dispatch import Router
+from history_fetch import PAGE_SIZE, fetch_range
+from leveling_panel import parse_xp_input, skill_index
+from leveling_pricing import engine_for
+from minigames_panel import MinigameSelect
+from quest_panel import QuestSelect, QuestSelectionView, calc_total
+from xp_table import xp_to_level
+
+BASELINE_FILE = "bench_baseline.json"
+TOLERANCE = 0.30  # allowed slowdown over baseline before --check fails
+ROUNDS = 9  # calibrated rounds per suite entry; the median is kept
+
+# Realistic spread of inputs: low levels, mid game and close to 99
+XP_SAMPLES = [0, 82, 83, 1_154, 13_363, 101_333, 737_627, 5_346_332, 13_034_431, 200_000_000]
+# What customers type into the XP modal
+XP_INPUTS = ["100k", "1.5m", "13034431", "lvl 70", "level 99", "50", "2,500,000", "737627"]
+# Price strings as they appear in the price file / *_data.py
+USD_STRINGS = ["$0.18", "$0.0036", "$12.50", "0.007", "$1000", "3"]
+
+
+# ---------- Reference implementations ----------
+def calibration(_):
+    """Fixed pure-Python work (str, dict and int ops) every suite result is measured against."""
+    table = {}
+    total = 0
+    for i in range(40):
+        key = str(i)
+        table[key] = i * i
+        total += table[key] % 7
+    return total
+
+
+def legacy_xp_to_level(xp: int):
+    """The original 99-step loop, kept only as a baseline for comparison."""
+    points = 0
+    for lvl in range(1, 100):
+        points += int(lvl + 300 * 2 ** (lvl / 7.0))
+        if xp < points / 4:
+            return lvl
+    return 99
+
+
+class FakeUser:
+    id = 1
+
+
+def legacy_quest_page(view):
+    """The original page flip: drop the select and rebuild 25 SelectOptions from the catalog."""
+    for child in list(view.children):
+        if isinstance(child, discord.ui.Select):
+            view.remove_item(child)
+    start = view.page * 25
+    options = [
+        discord.SelectOption(label=name, description=f"PKR {fmt_pkr(pkr)} • USD {fmt_usd(usd)}")
+        for name, pkr, usd in view.catalog.quests.items(view.catalog.quests.ids[start:start + 25])
+    ]
+    select = QuestSelect(options)
+    select.callback = view.select_callback
+    view.add_item(select)
+
+
+class FakeHistoryChannel:
+    """
+    Stand-in for a long ticket channel: `count` message ids spread over the
+    channel's lifetime, and every history page costs `latency` seconds.
+    """
+
+    def __init__(self, count: int, latency: float):
+        self.id = 1 << 40
+        self.ids = [self.id + (i + 1) * 7_919 for i in range(count)]
+        self.last_message_id = self.ids[-1]
+        self.latency = latency
+        self.requests = 0
+
+    def history(self, limit=None, after=None, before=None, oldest_first=True):
+        async def pages():
+            lo = bisect.bisect_right(self.ids, after.id if after else 0)
+            hi = bisect.bisect_left(self.ids, before.id) if before else len(self.ids)
+            if limit is not None:
+                hi = min(hi, lo + limit)
+            while True:
+                self.requests += 1
+                await asyncio.sleep(self.latency)
+                page = self.ids[lo:min(lo + PAGE_SIZE, hi)]
+                for message_id in page:
+                    yield FakeMessage(message_id)
+                lo += len(page)
+                if len(page) < PAGE_SIZE or lo >= hi:
+                    return
+        return pages()
+
+
+class FakeMessage:
+    __slots__ = ("id",)
+
+    def __init__(self, message_id: int):
+        self.id = message_id
+
+
+PANEL_IDS = ["btn_bossing", "btn_questing", "btn_leveling", "btn_minigames"]
+
+
+def legacy_dispatch(custom_id: str):
+    """The old on_interaction elif chain (one compare per panel button)."""
+    if custom_id == "btn_questing":
+        return 1
+    elif custom_id == "btn_leveling":
+        return 2
+    elif custom_id == "btn_minigames":
+        return 3
+    elif custom_id == "btn_bossing":
+        return 4
+
+
+class FakeInteraction:
+    __slots__ = ("data",)
+
+    def __init__(self, custom_id: str):
+        self.data = {"custom_id": custom_id}
+
+
+def run_sync(coro):
+    """Drive a coroutine that never actually suspends, without an event loop."""
+    try:
+        coro.send(None)
+    except StopIteration as stop:
+        return stop.value
+    raise RuntimeError("coroutine suspended")
+
+
+# ---------- Runner ----------
+def per_call_ns(func, samples, number=2_000):
+    """Best-of-5 average cost of one call, in nanoseconds."""
+    def run():
+        for s in samples:
+            func(s)
+    best = min(timeit.repeat(run, number=number, repeat=5))
+    return best / (number * len(samples)) * 1e9
+
+
+def bench_xp_to_level():
+    old = per_call_ns(legacy_xp_to_level, XP_SAMPLES)
+    new = per_call_ns(xp_to_level, XP_SAMPLES)
+    print(f"xp_to_level   loop: {old:9.1f} ns/call   table: {new:9.1f} ns/call   ({old / new:.1f}x)")
+
+
+def bench_leveling_quote():
+    # single-bracket and full 1-99 orders on a five-bracket line
+    ranges = [(5_000, 6_000), (0, 13_034_431), (101_333, 5_346_332)]
+    engine = engine_for(current_catalog())
+    cost = per_call_ns(lambda r: engine.quote("Woodcutting 15-35", *r), ranges, number=500)
+    print(f"leveling quote (multi-bracket, with breakdown): {cost:9.1f} ns/call")
+
+
+def bench_history_fetch(count=20_000, latency=0.005):
+    """Wall time to pull a long ticket's history: one sequential cursor vs parallel id windows."""
+    async def run(**kw):
+        channel = FakeHistoryChannel(count, latency)
+        seen = []
+        started = time.perf_counter()
+        await fetch_range(channel, channel.id, channel.last_message_id, seen.extend, lambda _: None, **kw)
+        assert len(seen) == count
+        return time.perf_counter() - started, channel.requests
+
+    seq, seq_requests = asyncio.run(run(windows=1, concurrency=1))
+    par, par_requests = asyncio.run(run())
+    print(f"history fetch {count:,} msgs   sequential: {seq:6.2f} s ({seq_requests} requests)   "
+          f"windowed: {par:6.2f} s ({par_requests} requests)   ({seq / par:.1f}x)")
+
+
+def bench_dispatch():
+    """Per-click routing cost: elif chain vs route table (panel ids plus unrouted DynamicItem ids)."""
+    router = Router()
+
+    async def handler(interaction):
+        return None
+
+    for cid in PANEL_IDS:
+        router.route(cid)(handler)
+    samples = PANEL_IDS + ["mg:method:3423071179", "lv:order:1:1:26.51c121:0:83:Attack"]
+    old = per_call_ns(legacy_dispatch, samples)
+    lookup = per_call_ns(router.resolve, samples)
+    full = per_call_ns(lambda cid: run_sync(router.dispatch(FakeInteraction(cid))), samples)
+    print(f"dispatch      elif: {old:9.1f} ns/call   route lookup: {lookup:9.1f} ns/call   "
+          f"full dispatch (coroutine + handler): {full:9.1f} ns/call")
+
+
+def bench_quest_pagination():
+    """Cost of one page flip in the quest picker (one quest picked per page): rebuild vs cached pages."""
+    def legacy_flipper():
+        view = QuestSelectionView(FakeUser(), "rsn")
+        view.selected = [page.ids[0] for page in view.pages]
+
+        def flip(_):
+            view.page = (view.page + 1) % len(view.pages)
+            legacy_quest_page(view)
+        return flip
+
+    def allocated(flip, flips=200):
+        tracemalloc.start()
+        for _ in range(flips):
+            flip(None)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return peak / 1024
+
+    old_flip, new_flip = legacy_flipper(), quest_page_flip()
+    old, new = per_call_ns(old_flip, [None], number=2_000), per_call_ns(new_flip, [None], number=2_000)
+    print(f"quest page flip   rebuild: {old / 1000:7.1f} us/flip ({allocated(old_flip):6.1f} KiB peak)   "
+          f"cached: {new / 1000:7.1f} us/flip ({allocated(new_flip):6.1f} KiB peak)   ({old / new:.1f}x)")
+
+
+# ---------- Hot-path suite (baselined) ----------
+def quest_carts(size=150, count=4):
+    """`count` random carts of `size` quests (fixed seed, so runs compare)."""
+    rng = random.Random(size)
+    ids = current_catalog().quests.ids
+    return [rng.sample(ids, min(size, len(ids))) for _ in range(count)]
+
+
+def quest_page_flip():
+    """Next page on a quest picker with one quest selected per page, wrapping around."""
+    view = QuestSelectionView(FakeUser(), "rsn")
+    view.selected = [page.ids[0] for page in view.pages]
+
+    def flip(_):
+        view.page = (view.page + 1) % len(view.pages)
+        view._update_select_for_page()
+    return flip
+
+
+def cold_skill_index(_):
+    """skill_index() on a copy of the live catalog with an empty cache: the build after a price reload."""
+    c = current_catalog()
+    return skill_index(Catalog(c.quests, c.bossing, c.leveling, c.minigames, c.version))
+
+
+def suite():
+    """name -> (function, samples, calls per sample). Every function here runs on interactions."""
+    return {
+        "calc_total 150-quest cart": (calc_total, quest_carts(), 200),
+        "calc_total 3-quest cart": (calc_total, quest_carts(3), 5_000),
+        "xp_to_level": (xp_to_level, XP_SAMPLES, 5_000),
+        "parse_xp_input": (parse_xp_input, XP_INPUTS, 2_000),
+        "skill_index build (fresh catalog)": (cold_skill_index, [None], 20),
+        "usd string -> minor": (lambda v: to_minor(v, USD_SCALE), USD_STRINGS, 2_000),
+        "MinigameSelect options": (lambda _: MinigameSelect(), [None], 200),
+        "quest page flip": (quest_page_flip(), [None], 2_000),
+    }
+
+
+def calibrated(func, samples, number: int):
+    """(median ns/call, median cost in calibration units) over ROUNDS rounds."""
+    costs, ratios = [], []
+    for _ in range(ROUNDS):
+        before = per_call_ns(calibration, [None], number=500)
+        ns = per_call_ns(func, samples, number=number)
+        after = per_call_ns(calibration, [None], number=500)
+        costs.append(ns)
+        ratios.append(ns / min(before, after))
+    return statistics.median(costs), statistics.median(ratios)
+
+
+def run_suite():
+    results = {}
+    for name, (func, samples, number) in suite().items():
+        ns, results[name] = calibrated(func, samples, number)
+        print(f"  {name:34s} {ns:12.1f} ns/call {results[name]:10.4f} cal")
+    return results
+
+
+def check(results, baseline, tolerance: float) -> bool:
+    """Compare against the baseline; True when nothing regressed past tolerance."""
+    ok = True
+    for name, cost in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"  {name:34s} no baseline")
+            continue
+        change = cost / base - 1
+        regressed = change > tolerance
+        ok &= not regressed
+        print(f"  {name:34s} {base:10.4f} -> {cost:10.4f} cal  {change:+7.1%}{'  REGRESSED' if regressed else ''}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--save", action="store_true", help=f"store the suite results in {BASELINE_FILE}")
+    parser.add_argument("--check", action="store_true", help="fail if the suite regressed past --tolerance")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="allowed slowdown, 0.3 = 30%%")
+    args = parser.parse_args()
+
+    if not (args.save or args.check):
+        bench_xp_to_level()
+        bench_leveling_quote()
+        bench_history_fetch()
+        bench_dispatch()
+        bench_quest_pagination()
+    print("hot-path suite")
+    results = run_suite()
+    if args.save:
+        with open(BASELINE_FILE, "w", encoding="utf-8") as f:
+            json.dump({name: round(cost, 4) for name, cost in results.items()}, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"baseline saved to {BASELINE_FILE}")
+    if args.check:
+        with open(BASELINE_FILE, encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(f"against {BASELINE_FILE} (tolerance {args.tolerance:.0%})")
+        if not check(results, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,74 +1,88 @@
 # bossing_panel.py
-import io
+import math
+
 import discord
-from discord.ui import View, Select, Modal, TextInput, Button
-from config import CATEGORY_TICKET_ID
-from bossing_data import BOSSING_RATES
+from discord.ui import View, Select, Modal, TextInput, Button, DynamicItem
+from ticket_service import open_ticket
+from ticket_controls import TicketControlView
+from dispatch import ROUTER
+from jobs import defer_then_run
+from order_ledger import Order
+from instrumentation import instrumented
+from catalog import ITEM_REF_RE, catalog_at, current_catalog, fmt_pkr, fmt_usd, fmt_usd_total, scale_minor
+
+MODAL_TIMEOUT = 600
+QTY_RE = r"[0-9.e+-]+"  # repr() of the quantity float
+EXPIRED = "⌛ This order has expired (prices changed). Please start again from the panel."
 
 # ---------------- Helper ----------------
-def format_currency(pkr):
-    try:
-        return f"{pkr:,.0f} PKR"
-    except Exception:
-        return f"{pkr} PKR"
-
-def usd_from_string(usd_str):
-    try:
-        return float(usd_str.strip().strip("$"))
-    except Exception:
-        return 0.0
+def format_currency(pkr_minor):
+    return f"{fmt_pkr(pkr_minor)} PKR"
 
 # ---------------- Start View ----------------
+# Selects and the order button are DynamicItems (state in the custom_id), so
+# nothing is kept per message and order buttons survive a restart.
 class BossingStartView(View):
     def __init__(self, user: discord.User):
         super().__init__(timeout=None)
         self.user = user
-        self.add_item(CategorySelect(user))
+        self.add_item(CategorySelect())
 
-class CategorySelect(Select):
-    def __init__(self, user: discord.User):
-        self.user = user
-        categories = list(BOSSING_RATES.keys())
+class CategorySelect(DynamicItem[Select], template=r"boss:cat"):
+    def __init__(self):
+        categories = list(current_catalog().bossing.groups)
         options = [discord.SelectOption(label=c, description=f"View {c}") for c in categories]
-        super().__init__(placeholder="Select a bossing category...", options=options)
+        super().__init__(Select(placeholder="Select a bossing category...", options=options, custom_id="boss:cat"))
+
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls()
 
+    @instrumented
     async def callback(self, interaction: discord.Interaction):
-        category = self.values[0]
-        bosses = BOSSING_RATES.get(category, {})
+        category = self.item.values[0]
+        catalog = current_catalog()
         embed = discord.Embed(
             title=f"💀 {category}",
             description="Choose a boss/service below:",
             color=discord.Color.dark_gold()
         )
-        await interaction.response.edit_message(embed=embed, view=BossSelectView(self.user, category, bosses))
+        await interaction.response.edit_message(embed=embed, view=BossSelectView(category, catalog))
 
 # ---------------- Boss Select ----------------
 class BossSelectView(View):
-    def __init__(self, user: discord.User, category: str, bosses: dict):
+    def __init__(self, category: str, catalog):
         super().__init__(timeout=None)
-        self.user = user
         self.category = category
-        self.bosses = bosses
+        self.catalog = catalog
         options = []
-        for name, (pkr, usd) in bosses.items():
+        for name, pkr, usd in catalog.bossing.items(catalog.bossing.groups.get(category, ())):
             label = name
-            desc = f"{pkr} PKR" if pkr else "Open ticket for quote"
-            if isinstance(usd, str) and usd != "$0.00":
-                desc += f" ({usd})"
-            options.append(discord.SelectOption(label=label, description=desc[:100]))
+            desc = f"{fmt_pkr(pkr)} PKR" if pkr else "Open ticket for quote"
+            if usd:
+                desc += f" ({fmt_usd(usd)})"
+            options.append(discord.SelectOption(label=label, value=catalog.bossing.ref(name), description=desc[:100]))
         options = options[:25]
-        self.add_item(BossSelect(self.user, category, bosses, options))
+        self.add_item(BossSelect(catalog, options))
 
-class BossSelect(Select):
-    def __init__(self, user: discord.User, category: str, bosses: dict, options):
-        self.user = user
-        self.category = category
-        self.bosses = bosses
-        super().__init__(placeholder="Select boss/service...", options=options)
+class BossSelect(DynamicItem[Select], template=r"boss:pick:(?P<version>\d+)"):
+    def __init__(self, catalog, options=()):
+        self.catalog = catalog
+        super().__init__(Select(placeholder="Select boss/service...", options=list(options),
+                                custom_id=f"boss:pick:{catalog.version}"))
 
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls(catalog_at(int(match["version"])) or current_catalog(), item.options)
+
+    @instrumented
     async def callback(self, interaction: discord.Interaction):
-        selection = self.values[0]
-        price_pkr, price_usd = self.bosses.get(selection, (0, "$0.00"))
+        bossing = self.catalog.bossing
+        selection = bossing.resolve(self.item.values[0])
+        if selection is None:
+            await interaction.response.send_message(EXPIRED, ephemeral=True)
+            return
+        price_pkr, price_usd = bossing.price(selection)
         if price_pkr == 0:
             embed = discord.Embed(
                 title=f"💬 {selection} - Quote Required",
@@ -78,204 +92,127 @@ class BossSelect(Select):
             await interaction.response.defer(ephemeral=True, thinking=False)
             await interaction.followup.send(
                 embed=embed,
-                view=CreateTicketView(self.user, selection, 0, 0.0, 0.0, quote=True),
+                view=CreateTicketView(interaction.user, self.catalog, selection, 0),
                 ephemeral=True
             )
             return
 
         await interaction.response.send_modal(
-            BossQuantityModal(self.user, selection, price_pkr, price_usd)
+            BossQuantityModal(interaction.user, selection, price_pkr, price_usd, self.catalog)
         )
 
 # ---------------- Quantity Modal ----------------
 class BossQuantityModal(Modal):
-    def __init__(self, user: discord.User, selection: str, price_pkr: float, price_usd: str):
-        super().__init__(title="Enter Quantity / Runs")
+    def __init__(self, user: discord.User, selection: str, price_pkr: int, price_usd: int, catalog):
+        super().__init__(title="Enter Quantity / Runs", timeout=MODAL_TIMEOUT)
         self.user = user
         self.selection = selection
         self.price_pkr = price_pkr
         self.price_usd = price_usd
+        self.catalog = catalog
         self.qty = TextInput(label="How many kills/runs/items?", placeholder="e.g. 10", required=True)
         self.add_item(self.qty)
 
+    @instrumented
     async def on_submit(self, interaction: discord.Interaction):
         try:
             qty = float(self.qty.value)
         except Exception:
+            qty = None
+        if qty is None or not math.isfinite(qty) or qty <= 0:
             await interaction.response.send_message("❌ Please enter a valid number.", ephemeral=True)
             return
 
-        total_pkr = self.price_pkr * qty
-        usd_unit = usd_from_string(self.price_usd)
-        total_usd = usd_unit * qty
+        total_pkr = scale_minor(self.price_pkr, qty)
+        total_usd = scale_minor(self.price_usd, qty)
 
         embed = discord.Embed(
             title=f"💀 {self.selection}",
             description=(
-                f"**Unit:** {format_currency(self.price_pkr)} ({self.price_usd})\n"
+                f"**Unit:** {format_currency(self.price_pkr)} ({fmt_usd(self.price_usd)})\n"
                 f"**Quantity:** {qty:,}\n\n"
-                f"💰 **Total:** {format_currency(total_pkr)} (${total_usd:,.2f} USD)"
+                f"💰 **Total:** {format_currency(total_pkr)} ({fmt_usd_total(total_usd)} USD)"
             ),
             color=discord.Color.dark_gold()
         )
         embed.set_footer(text="Click below to create a ticket for this bossing order.")
-        await interaction.response.send_message(embed=embed, view=CreateTicketView(self.user, self.selection, qty, total_pkr, total_usd), ephemeral=True)
+        await interaction.response.send_message(embed=embed, view=CreateTicketView(self.user, self.catalog, self.selection, qty), ephemeral=True)
 
 # ---------------- Ticket Creation ----------------
 class CreateTicketView(View):
-    def __init__(self, user: discord.User, selection: str, qty: float, total_pkr: float, total_usd: float, quote: bool=False):
+    def __init__(self, user: discord.User, catalog, selection: str, qty: float):
         super().__init__(timeout=None)
-        self.user = user
-        self.selection = selection
+        self.add_item(CreateTicketButton(user.id, catalog.version, catalog.bossing.ref(selection), qty))
+
+class CreateTicketButton(
+    DynamicItem[Button],
+    template=rf"boss:order:(?P<owner>\d+):(?P<version>\d+):(?P<ref>{ITEM_REF_RE}):(?P<qty>{QTY_RE})",
+):
+    def __init__(self, owner_id: int, version: int, ref: str, qty: float):
+        super().__init__(Button(label="🎟 Create Ticket", style=discord.ButtonStyle.success,
+                                custom_id=f"boss:order:{owner_id}:{version}:{ref}:{qty!r}"))
+        self.owner_id = owner_id
+        self.version = version
+        self.ref = ref
         self.qty = qty
-        self.total_pkr = total_pkr
-        self.total_usd = total_usd
-        self.quote = quote
 
-    @discord.ui.button(label="🎟 Create Ticket", style=discord.ButtonStyle.success)
-    async def create_ticket(self, interaction: discord.Interaction, button: discord.ui.Button):
-        guild = interaction.guild
-        category = discord.utils.get(guild.categories, id=CATEGORY_TICKET_ID)
-        if not category:
-            category = discord.utils.get(guild.categories, name="Tickets")
-        if not category:
-            category = await guild.create_category("Tickets")
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls(int(match["owner"]), int(match["version"]), match["ref"], float(match["qty"]))
 
-        channel = await guild.create_text_channel(
-            name=f"ticket-{self.user.name.lower()}",
-            category=category,
-            topic=f"Bossing order for {self.user.name}: {self.selection}",
-        )
-        await channel.set_permissions(self.user, view_channel=True, send_messages=True)
+    @instrumented
+    async def callback(self, interaction: discord.Interaction):
+        if interaction.user.id != self.owner_id:
+            await interaction.response.send_message("This button is only for the user who requested the order.", ephemeral=True)
+            return
+
+        catalog = catalog_at(self.version)  # None if these prices are no longer in the recent snapshots
+        selection = catalog.bossing.resolve(self.ref) if catalog else None
+        if selection is None:
+            await interaction.response.send_message(EXPIRED, ephemeral=True)
+            return
+        price_pkr, price_usd = catalog.bossing.price(selection)
+        user = interaction.user
 
-        if self.quote:
-            desc = f"**Customer:** {self.user.mention}\n\nThis service requires a quote from staff. Please wait for staff to reply."
+        if price_pkr == 0:
+            desc = f"**Customer:** {user.mention}\n\nThis service requires a quote from staff. Please wait for staff to reply."
         else:
             desc = (
-                f"**Customer:** {self.user.mention}\n"
-                f"**Service:** {self.selection}\n"
+                f"**Customer:** {user.mention}\n"
+                f"**Service:** {selection}\n"
                 f"**Quantity:** {self.qty:,}\n"
-                f"**Total:** {format_currency(self.total_pkr)} (${self.total_usd:,.2f} USD)\n\n"
+                f"**Total:** {format_currency(scale_minor(price_pkr, self.qty))} "
+                f"({fmt_usd_total(scale_minor(price_usd, self.qty))} USD)\n\n"
                 "Staff will contact you soon!"
             )
 
         embed = discord.Embed(
-            title=f"💀 Bossing Order - {self.selection}",
+            title=f"💀 Bossing Order - {selection}",
             description=desc,
-            color=discord.Color.dark_red() if "Firecape" in self.selection else discord.Color.dark_gold()
+            color=discord.Color.dark_red() if "Firecape" in selection else discord.Color.dark_gold()
         )
-        await channel.send(embed=embed, view=TicketControlView(self.user))
-        await interaction.response.send_message(f"✅ Ticket created: {channel.mention}", ephemeral=True)
-
-# ---------------- Ticket Controls ----------------
-class TicketControlView(View):
-    def __init__(self, owner: discord.Member):
-        super().__init__(timeout=None)
-        self.owner = owner
-        self.add_item(CloseTicketButton(owner))
-
-class CloseTicketButton(Button):
-    def __init__(self, owner: discord.Member):
-        super().__init__(label="🔒 Close Ticket", style=discord.ButtonStyle.red)
-        self.owner = owner
-
-    async def callback(self, interaction: discord.Interaction):
-        await interaction.response.send_message(
-            "Are you sure you want to close this ticket?",
-            view=CloseConfirmView(self.owner),
-            ephemeral=True
+        embed.set_footer(text=f"Prices v{catalog.version}")
+        job = lambda: open_ticket(
+            interaction.guild,
+            user,
+            topic=f"Bossing order for {user.name}: {selection}",
+            embed=embed,
+            view=TicketControlView(user),
+            order=Order("bossing", user.id, None, (selection,), self.qty,
+                        scale_minor(price_pkr, self.qty), scale_minor(price_usd, self.qty), catalog.version),
         )
+        await defer_then_run(interaction, job, lambda channel: f"✅ Ticket created: {channel.mention}")
 
-class CloseConfirmView(View):
-    def __init__(self, owner: discord.Member):
-        super().__init__(timeout=20)
-        self.owner = owner
 
-    @discord.ui.button(label="✅ Yes", style=discord.ButtonStyle.success)
-    async def yes(self, interaction: discord.Interaction, button: discord.ui.Button):
-        await interaction.response.defer()
-        try:
-            await interaction.message.delete()
-        except discord.NotFound:
-            pass
-
-        try:
-            await interaction.channel.set_permissions(self.owner, send_messages=False, view_channel=False)
-            await interaction.channel.edit(name=f"closed-{self.owner.name.lower()}")
-        except Exception:
-            pass
+DYNAMIC_ITEMS = (CategorySelect, BossSelect, CreateTicketButton)
 
-        embed = discord.Embed(
-            title="🔒 Ticket Closed",
-            description=f"Ticket closed by {interaction.user.mention}\nStaff options below:",
-            color=discord.Color.dark_gold()
-        )
-        await interaction.channel.send(embed=embed, view=StaffAfterCloseView(self.owner))
-
-    @discord.ui.button(label="❌ No", style=discord.ButtonStyle.gray)
-    async def no(self, interaction: discord.Interaction, button: discord.ui.Button):
-        await interaction.response.send_message("❌ Ticket closure cancelled.", ephemeral=True)
-
-class StaffAfterCloseView(View):
-    def __init__(self, owner: discord.Member):
-        super().__init__(timeout=None)
-        self.owner = owner
-        self.add_item(ReopenButton(owner))
-        self.add_item(TranscriptButton())
-        self.add_item(DeleteButton())
-
-class ReopenButton(Button):
-    def __init__(self, owner: discord.Member):
-        super().__init__(label="🔓 Reopen Ticket", style=discord.ButtonStyle.green)
-        self.owner = owner
-
-    async def callback(self, interaction: discord.Interaction):
-        try:
-            await interaction.channel.set_permissions(self.owner, view_channel=True, send_messages=True)
-            await interaction.channel.edit(name=f"ticket-{self.owner.name.lower()}")
-        except Exception:
-            pass
-        await interaction.response.send_message("✅ Ticket reopened.", ephemeral=True)
-
-class TranscriptButton(Button):
-    def __init__(self):
-        super().__init__(label="📜 Transcript", style=discord.ButtonStyle.blurple)
-
-    async def callback(self, interaction: discord.Interaction):
-        messages = []
-        async for msg in interaction.channel.history(limit=None, oldest_first=True):
-            messages.append(f"[{msg.created_at.isoformat()}] {msg.author}: {msg.content}")
-        transcript = "\n".join(messages)
-        bio = io.BytesIO(transcript.encode("utf-8"))
-        file = discord.File(fp=bio, filename="transcript.txt")
-        try:
-            await interaction.user.send(file=file)
-            await interaction.response.send_message("📜 Transcript sent to your DMs.", ephemeral=True)
-        except Exception:
-            await interaction.response.send_message("⚠️ Unable to DM transcript to you.", ephemeral=True)
-
-class DeleteButton(Button):
-    def __init__(self):
-        super().__init__(label="❌ Delete Ticket", style=discord.ButtonStyle.red)
-
-    async def callback(self, interaction: discord.Interaction):
-        await interaction.response.send_message(
-            "Are you sure you want to delete this ticket?",
-            view=ConfirmDeleteView(),
-            ephemeral=True
-        )
-
-class ConfirmDeleteView(View):
-    def __init__(self):
-        super().__init__(timeout=20)
-
-    @discord.ui.button(label="✅ Yes", style=discord.ButtonStyle.danger)
-    async def yes(self, interaction: discord.Interaction, button: discord.ui.Button):
-        try:
-            await interaction.channel.delete()
-        except Exception:
-            pass
 
-    @discord.ui.button(label="❌ No", style=discord.ButtonStyle.gray)
-    async def no(self, interaction: discord.Interaction, button: discord.ui.Button):
-        await interaction.response.send_message("❌ Deletion canceled.", ephemeral=True)
+# ---------------- Panel entry ----------------
+@ROUTER.panel("btn_bossing", "💀 Bossing", "Order Bossing services", position=0)
+async def open_bossing(interaction: discord.Interaction):
+    embed = discord.Embed(
+        title="💀 Bossing Services",
+        description="Select a bossing category to begin (Slayer / Wilderness / Raids / Misc).",
+        color=discord.Color.dark_red(),
+    )
+    await interaction.response.send_message(embed=embed, view=BossingStartView(interaction.user), ephemeral=True)
@@ -0,0 +1,335 @@
+# catalog.py
+import asyncio
+import json
+import os
+import zlib
+from array import array
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+from config import PRICES_FILE, PRICES_WATCH_SECONDS
+from quests_data import QUESTS
+from bossing_data import BOSSING_RATES
+from leveling_data import LEVELING_BASE_RATES, PRICE_MULTIPLIER, USD_RATE, build_leveling_rates
+from minigames_data import MINIGAMES_RATES
+
+# Prices are stored as integers in minor units so totals never drift:
+# PKR in paisa, USD in 1/100 cent (leveling rates carry four USD decimals).
+PKR_SCALE = 100
+USD_SCALE = 10_000
+# Section.ref() format, for custom_id templates
+ITEM_REF_RE = r"\d+\.[0-9a-f]{6}"
+
+
+# ---------- Conversion ----------
+def to_minor(value, scale: int) -> int:
+    """12.5 -> 1250, '$0.0036' -> 36 (scale 10_000). Strings are parsed exactly."""
+    if isinstance(value, str):
+        value = value.replace("$", "").strip() or "0"
+    return int((Decimal(str(value)) * scale).to_integral_value())
+
+
+def _trim(value: Decimal, min_places: int) -> str:
+    text = f"{value:,f}"
+    if "." in text:
+        whole, frac = text.split(".")
+        frac = frac.rstrip("0").ljust(min_places, "0")
+        return f"{whole}.{frac}" if frac else whole
+    return text + ("." + "0" * min_places if min_places else "")
+
+
+def fmt_pkr(minor: int) -> str:
+    """1250 -> '12.5', 5000 -> '50', 186800 -> '1,868'."""
+    return _trim(Decimal(minor) / PKR_SCALE, 0)
+
+
+def fmt_usd(minor: int) -> str:
+    """1800 -> '$0.18', 36 -> '$0.0036', 70 -> '$0.007'."""
+    return "$" + _trim(Decimal(minor) / USD_SCALE, 2)
+
+
+def fmt_pkr_total(minor: int) -> str:
+    """Whole rupees for order totals: 19208946 -> '192,089'."""
+    return f"{(Decimal(minor) / PKR_SCALE).quantize(Decimal(1), ROUND_HALF_UP):,}"
+
+
+def fmt_usd_total(minor: int) -> str:
+    """Cents for order totals: 6912198 -> '$691.22'."""
+    return f"${(Decimal(minor) / USD_SCALE).quantize(Decimal('0.01'), ROUND_HALF_UP):,}"
+
+
+def scale_minor(minor: int, qty) -> int:
+    """Unit price × quantity, rounded to the nearest minor unit."""
+    if isinstance(qty, float) and qty.is_integer():
+        qty = int(qty)
+    if isinstance(qty, int):
+        return minor * qty
+    return int((Decimal(minor) * Decimal(str(qty))).to_integral_value())
+
+
+# ---------- Sections ----------
+class Section:
+    """
+    One price table (quests, bossing, ...). Item ids are the original names;
+    prices live in two parallel int64 arrays indexed through `index`.
+    """
+
+    __slots__ = ("name", "ids", "index", "pkr", "usd", "groups")
+
+    def __init__(self, name: str, items, groups=None):
+        self.name = name
+        self.ids = tuple(item_id for item_id, _, _ in items)
+        self.index = {item_id: i for i, item_id in enumerate(self.ids)}
+        if len(self.index) != len(self.ids):
+            raise ValueError(f"{name}: duplicate item names")
+        self.pkr = array("q", (_checked_minor(name, i, pkr, PKR_SCALE) for i, pkr, _ in items))
+        self.usd = array("q", (_checked_minor(name, i, usd, USD_SCALE) for i, _, usd in items))
+        self.groups = groups or {}  # group name -> tuple of item ids
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    def __contains__(self, item_id):
+        return item_id in self.index
+
+    def price(self, item_id):
+        """(pkr_minor, usd_minor) for one item, O(1). Raises KeyError for unknown ids."""
+        i = self.index[item_id]
+        return self.pkr[i], self.usd[i]
+
+    def items(self, ids=None):
+        """Yield (id, pkr_minor, usd_minor) for `ids` (default: every item, in catalog order)."""
+        for item_id in self.ids if ids is None else ids:
+            i = self.index[item_id]
+            yield item_id, self.pkr[i], self.usd[i]
+
+    def ref(self, item_id) -> str:
+        """Short item reference for custom_ids: '<index>.<crc24 of the name>'."""
+        return f"{self.index[item_id]}.{zlib.crc32(item_id.encode()) & 0xFFFFFF:06x}"
+
+    def resolve(self, ref: str):
+        """Item id for a ref(), or None if this snapshot no longer has that item at that index."""
+        i, _, _ = ref.partition(".")
+        if not i.isdigit() or int(i) >= len(self.ids):
+            return None
+        item_id = self.ids[int(i)]
+        return item_id if self.ref(item_id) == ref else None
+
+    def total(self, ids):
+        """Summed (pkr_minor, usd_minor) for `ids`, O(k). Unknown ids count as 0."""
+        index, pkr, usd = self.index, self.pkr, self.usd
+        total_pkr = total_usd = 0
+        for item_id in ids:
+            i = index.get(item_id)
+            if i is not None:
+                total_pkr += pkr[i]
+                total_usd += usd[i]
+        return total_pkr, total_usd
+
+
+def _checked_minor(section: str, item_id, value, scale: int) -> int:
+    """to_minor() that rejects non-numbers and negative prices with a readable error."""
+    if not isinstance(item_id, str) or not item_id.strip():
+        raise ValueError(f"{section}: item names must be non-empty strings")
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise ValueError(f"{section}: bad price for {item_id!r}")
+    try:
+        minor = to_minor(value, scale)
+    except InvalidOperation:
+        raise ValueError(f"{section}: bad price for {item_id!r}") from None
+    if minor < 0:
+        raise ValueError(f"{section}: negative price for {item_id!r}")
+    return minor
+
+
+class Catalog:
+    """
+    One immutable price snapshot. Sessions hold on to the snapshot they were
+    quoted on; a reload builds a new one. The version is a fingerprint of the
+    prices, so it never means different prices across reloads or restarts.
+    `cache` holds structures derived from this snapshot (pricing engine, ...).
+    """
+
+    __slots__ = ("quests", "bossing", "leveling", "minigames", "version", "cache")
+
+    def __init__(self, quests: Section, bossing: Section, leveling: Section, minigames: Section, version: int = None):
+        self.quests = quests
+        self.bossing = bossing
+        self.leveling = leveling
+        self.minigames = minigames
+        self.version = self.fingerprint() if version is None else version
+        self.cache = {}
+
+    def fingerprint(self) -> int:
+        """crc32 over every section's ids and prices."""
+        crc = 0
+        for section in (self.quests, self.bossing, self.leveling, self.minigames):
+            crc = zlib.crc32("\0".join(map(str, section.ids)).encode(), crc)
+            crc = zlib.crc32(section.pkr.tobytes() + section.usd.tobytes(), crc)
+        return crc
+
+
+# ---------- Loading ----------
+def minigame_name(item_id: str) -> str:
+    """'Pest Control - Novice' -> 'Pest Control'."""
+    return item_id.split(" - ")[0]
+
+
+def _pairs(section: str, table: dict):
+    """[(name, pkr, usd)] from {name: (pkr, usd)}, rejecting malformed entries."""
+    items = []
+    for name, value in table.items():
+        if not isinstance(value, (list, tuple)) or len(value) != 2:
+            raise ValueError(f"{section}: {name!r} must be [pkr, usd]")
+        items.append((name, value[0], value[1]))
+    return items
+
+
+def build_catalog(quests, bossing, leveling, minigames, version: int = None) -> Catalog:
+    boss_items, boss_groups = [], {}
+    for category, bosses in bossing.items():
+        boss_groups[category] = tuple(bosses)
+        boss_items.extend(_pairs("bossing", bosses))
+
+    game_groups = {}
+    for name in minigames:
+        game_groups.setdefault(minigame_name(name), []).append(name)
+
+    return Catalog(
+        quests=Section("quests", sorted(_pairs("quests", quests), key=lambda i: str(i[0]).lower())),
+        bossing=Section("bossing", boss_items, boss_groups),
+        leveling=Section("leveling", _pairs("leveling", leveling)),
+        minigames=Section("minigames", _pairs("minigames", minigames),
+                          {g: tuple(v) for g, v in sorted(game_groups.items())}),
+        version=version,
+    )
+
+
+# ---------- Price file ----------
+def _merge(base: dict, overrides, section: str) -> dict:
+    """Apply {name: value} overrides on top of `base`; a null value removes the entry."""
+    if not isinstance(overrides, dict):
+        raise ValueError(f"{section}: expected an object")
+    merged = dict(base)
+    for name, value in overrides.items():
+        if value is None:
+            merged.pop(name, None)
+        else:
+            merged[name] = value
+    return merged
+
+
+def _positive(raw: dict, key: str, default) -> float:
+    value = raw.get(key, default)
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0:
+        raise ValueError(f"{key} must be a positive number")
+    return value
+
+
+def read_price_file(path: str = PRICES_FILE) -> dict:
+    """Parsed price file, or {} when there is none."""
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        raw = json.load(f)
+    if not isinstance(raw, dict):
+        raise ValueError("price file must contain a JSON object")
+    return raw
+
+
+def load_catalog(raw: dict, version: int = None) -> Catalog:
+    """
+    Build and validate a snapshot from the *_data.py tables plus price file overrides:
+    price_multiplier / usd_rate (leveling), quests/minigames {name: [pkr, usd]},
+    bossing {category: {name: [pkr, usd]}}, leveling {name: base_pkr}.
+    Raises ValueError if anything is malformed; nothing is swapped in that case.
+    """
+    multiplier = _positive(raw, "price_multiplier", PRICE_MULTIPLIER)
+    usd_rate = _positive(raw, "usd_rate", USD_RATE)
+
+    boss_overrides = raw.get("bossing", {})
+    if not isinstance(boss_overrides, dict):
+        raise ValueError("bossing: expected an object")
+    bossing = {}
+    for category in list(BOSSING_RATES) + [c for c in boss_overrides if c not in BOSSING_RATES]:
+        overrides = boss_overrides.get(category, {})
+        if overrides is None:
+            continue  # null drops the whole category
+        bossing[category] = _merge(BOSSING_RATES.get(category, {}), overrides, f"bossing.{category}")
+
+    leveling_base = _merge(LEVELING_BASE_RATES, raw.get("leveling", {}), "leveling")
+    for name, pkr in leveling_base.items():
+        if isinstance(pkr, bool) or not isinstance(pkr, (int, float)) or pkr < 0:
+            raise ValueError(f"leveling: bad price for {name!r}")
+
+    return build_catalog(
+        quests=_merge(QUESTS, raw.get("quests", {}), "quests"),
+        bossing=bossing,
+        leveling=build_leveling_rates(multiplier, usd_rate, leveling_base),
+        minigames=_merge(MINIGAMES_RATES, raw.get("minigames", {}), "minigames"),
+        version=version,
+    )
+
+
+# ---------- Snapshots ----------
+def _initial_catalog() -> Catalog:
+    try:
+        return load_catalog(read_price_file())
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Ignoring {PRICES_FILE}: {e}")
+        return load_catalog({})
+
+
+_current = _initial_catalog()
+# Last few snapshots by version, so stateless buttons that carry a version keep their prices
+RECENT_SNAPSHOTS = 8
+_recent = {_current.version: _current}
+
+
+def current_catalog() -> Catalog:
+    """The live snapshot. Grab it once per session and keep using that object."""
+    return _current
+
+
+def catalog_at(version: int):
+    """Snapshot `version` if it is still recent, else None (evicted, or from before a restart)."""
+    return _recent.get(version)
+
+
+def reload_catalog(path: str = PRICES_FILE) -> Catalog:
+    """
+    Re-read the price file and atomically swap in a new snapshot.
+    Raises OSError/ValueError (and keeps the old snapshot) if the file is invalid.
+    """
+    global _current
+    new = load_catalog(read_price_file(path))
+    _current = new  # single reference swap; open sessions keep their old snapshot
+    _recent.pop(new.version, None)  # unchanged prices: same version, now the newest
+    _recent[new.version] = new
+    if len(_recent) > RECENT_SNAPSHOTS:
+        del _recent[next(iter(_recent))]
+    return new
+
+
+async def watch_price_file(path: str = PRICES_FILE, interval: float = PRICES_WATCH_SECONDS):
+    """Poll the price file's mtime and reload whenever it changes."""
+    def mtime():
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+    last = mtime()
+    while True:
+        await asyncio.sleep(interval)
+        now = mtime()
+        if now == last:
+            continue
+        last = now
+        try:
+            catalog = reload_catalog(path)
+            print(f"💱 Prices reloaded from {path} (v{catalog.version})")
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Price reload failed, keeping v{_current.version}: {e}")
@@ -0,0 +1,236 @@
+# category_pool.py
+import asyncio
+import bisect
+import logging
+import re
+
+import discord
+
+from config import CATEGORY_CHANNEL_LIMIT, CATEGORY_FOLD_DELAY, TICKET_CATEGORY_SHARDS
+from metrics import Counter, Gauge
+
+log = logging.getLogger(__name__)
+
+CATEGORY_FILL = Gauge("ticket_category_channels", "Channels (incl. tickets being created) per ticket category",
+                      ["category"])
+OVERFLOW = Counter("ticket_category_overflow_total", "Overflow categories created and folded back", ["action"])
+
+OVERFLOW_RE = re.compile(r"^(?P<base>.+) (?P<n>\d+)$")
+
+
+class _Pool:
+    """One base category ('Tickets') and its overflows ('Tickets 2', ...)."""
+
+    __slots__ = ("guild_id", "name", "numbers", "free", "lock")
+
+    def __init__(self, guild_id: int, name: str):
+        self.guild_id = guild_id
+        self.name = name
+        self.numbers = {}  # category_id -> 1 for the base, n for 'name n'
+        self.free = []     # sorted (number, category_id) of categories with room
+        self.lock = asyncio.Lock()
+
+
+class CategoryPool:
+    """
+    Picks the category for each new ticket so no category passes Discord's
+    50-channel cap. Channel counts per category are seeded once from the
+    guild cache and then kept live from channel create/delete/update events,
+    plus in-flight reservations; each pool keeps its categories with room
+    sorted by number, so the pick is O(1) and fills 'Tickets' before 'Tickets 2'. A full pool gets a new overflow
+    category; an overflow that stays empty is deleted again. Services listed
+    in TICKET_CATEGORY_SHARDS get a pool of their own.
+    """
+
+    def __init__(self, limit: int = CATEGORY_CHANNEL_LIMIT, fold_delay: float = CATEGORY_FOLD_DELAY,
+                 shards: dict = TICKET_CATEGORY_SHARDS):
+        self.limit = limit
+        self.fold_delay = fold_delay
+        self.shards = shards
+        self.counts = {}    # category_id -> channels in it
+        self.pending = {}   # category_id -> tickets being created in it
+        self.pools = {}     # (guild_id, pool name) -> _Pool
+        self.pool_of = {}   # category_id -> _Pool
+        self._folding = {}  # category_id -> pending fold task (referenced until done)
+
+    def load(self, category_id: int) -> int:
+        return self.counts.get(category_id, 0) + self.pending.get(category_id, 0)
+
+    # ---------- Cache ----------
+    def seed(self, guild: discord.Guild):
+        """Count every category's channels (one pass over the cache, on startup)."""
+        for pool in [p for key, p in self.pools.items() if key[0] == guild.id]:
+            self._drop_pool(pool)
+        for category in guild.categories:
+            self.counts[category.id] = 0
+        for channel in guild.channels:
+            if channel.category_id:
+                self.counts[channel.category_id] = self.counts.get(channel.category_id, 0) + 1
+
+    def _drop_pool(self, pool: _Pool):
+        for category_id in pool.numbers:
+            self.pool_of.pop(category_id, None)
+        del self.pools[(pool.guild_id, pool.name)]
+
+    def _pool(self, guild: discord.Guild, name: str) -> _Pool:
+        pool = self.pools.get((guild.id, name))
+        if pool is None:
+            pool = self.pools[(guild.id, name)] = _Pool(guild.id, name)
+            for category in guild.categories:
+                self._adopt(pool, category)
+        return pool
+
+    def _adopt(self, pool: _Pool, category: discord.CategoryChannel):
+        """Add `category` to `pool` if it is the base or one of its overflows."""
+        m = OVERFLOW_RE.match(category.name)
+        if category.name == pool.name:
+            number = 1
+        elif m and m["base"] == pool.name:
+            number = int(m["n"])
+        else:
+            return
+        pool.numbers[category.id] = number
+        self.pool_of[category.id] = pool
+        self._refresh(category.id, category.name)
+
+    def _refresh(self, category_id: int, name: str = None):
+        pool = self.pool_of.get(category_id)
+        if pool is None:
+            return
+        entry = (pool.numbers[category_id], category_id)
+        i = bisect.bisect_left(pool.free, entry)
+        listed = i < len(pool.free) and pool.free[i] == entry
+        if self.load(category_id) < self.limit:
+            if not listed:
+                pool.free.insert(i, entry)
+        elif listed:
+            del pool.free[i]
+        if name:
+            CATEGORY_FILL.set(self.load(category_id), category=name)
+
+    def is_ticket_category(self, base, category) -> bool:
+        """Whether `category` is `base`, a shard or one of their overflows."""
+        if base is None or category is None:
+            return False
+        if category.id in self.pool_of:
+            return True
+        names = {base.name, *self.shards.values()}
+        m = OVERFLOW_RE.match(category.name)
+        return category.name in names or bool(m and m["base"] in names)
+
+    # ---------- Picking ----------
+    def pool_name(self, base: discord.CategoryChannel, service: str = None) -> str:
+        return self.shards.get(service) or base.name
+
+    async def acquire(self, guild: discord.Guild, base, service: str = None):
+        """
+        Category for a new ticket (None when the guild has no ticket category),
+        with a slot reserved in it. Call release() once the channel is created
+        or creation failed.
+        """
+        if base is None:
+            return None
+        pool = self._pool(guild, self.pool_name(base, service))
+        category_id = pool.free[0][1] if pool.free else None
+        if category_id is None:
+            async with pool.lock:  # only one overflow gets created per burst
+                category_id = pool.free[0][1] if pool.free else None
+                if category_id is None:
+                    category_id = (await self._create(guild, pool, base)).id
+        self.pending[category_id] = self.pending.get(category_id, 0) + 1
+        self._refresh(category_id)
+        return guild.get_channel(category_id)
+
+    def release(self, category):
+        if category is None:
+            return
+        left = self.pending.get(category.id, 0) - 1
+        if left > 0:
+            self.pending[category.id] = left
+        else:
+            self.pending.pop(category.id, None)
+        self._refresh(category.id, category.name)
+
+    async def _create(self, guild: discord.Guild, pool: _Pool, base: discord.CategoryChannel):
+        """The pool's next category: its base if missing (a new shard), else 'name n'."""
+        number = max(pool.numbers.values(), default=0) + 1
+        name = pool.name if number == 1 else f"{pool.name} {number}"
+        anchor = next((guild.get_channel(c) for c, n in pool.numbers.items() if n == number - 1), base)
+        category = await guild.create_category(name, overwrites=base.overwrites, position=anchor.position + 1,
+                                               reason="Ticket category full")
+        self.counts.setdefault(category.id, 0)
+        self._adopt(pool, category)
+        OVERFLOW.inc(action="created")
+        log.info("Ticket category %r is full, created %r", pool.name, name)
+        return category
+
+    # ---------- Gateway events ----------
+    def channel_created(self, channel):
+        if isinstance(channel, discord.CategoryChannel):
+            self.counts.setdefault(channel.id, 0)
+            self._adopt_any(channel)
+        elif channel.category_id:
+            self.counts[channel.category_id] = self.counts.get(channel.category_id, 0) + 1
+            self._refresh(channel.category_id, channel.category.name if channel.category else None)
+
+    def channel_deleted(self, channel):
+        if isinstance(channel, discord.CategoryChannel):
+            self.counts.pop(channel.id, None)
+            self._disown(channel.id)
+        elif channel.category_id:
+            self._left(channel.guild, channel.category_id)
+
+    def channel_moved(self, before, after):
+        if isinstance(after, discord.CategoryChannel):
+            if before.name != after.name:  # may join or leave a pool
+                self._disown(after.id)
+                self._adopt_any(after)
+            return
+        if before.category_id == after.category_id:
+            return
+        if before.category_id:
+            self._left(after.guild, before.category_id)
+        if after.category_id:
+            self.counts[after.category_id] = self.counts.get(after.category_id, 0) + 1
+            self._refresh(after.category_id)
+
+    def _adopt_any(self, category: discord.CategoryChannel):
+        for (guild_id, _), pool in self.pools.items():
+            if guild_id == category.guild.id and category.id not in self.pool_of:
+                self._adopt(pool, category)
+
+    def _disown(self, category_id: int):
+        pool = self.pool_of.pop(category_id, None)
+        if pool is not None:
+            pool.free = [entry for entry in pool.free if entry[1] != category_id]
+            pool.numbers.pop(category_id, None)
+
+    def _left(self, guild: discord.Guild, category_id: int):
+        self.counts[category_id] = max(self.counts.get(category_id, 0) - 1, 0)
+        self._refresh(category_id)
+        pool = self.pool_of.get(category_id)
+        if pool and pool.numbers.get(category_id, 1) > 1 and not self.load(category_id):
+            if category_id not in self._folding:
+                task = asyncio.create_task(self._fold(guild, category_id), name=f"fold-category-{category_id}")
+                self._folding[category_id] = task
+                task.add_done_callback(lambda t: self._fold_done(category_id, t))
+
+    async def _fold(self, guild: discord.Guild, category_id: int):
+        """Delete an overflow category that is still empty after fold_delay."""
+        try:
+            await asyncio.sleep(self.fold_delay)
+            category = guild.get_channel(category_id)
+            if category is None or self.load(category_id) or category.channels:
+                return
+            await category.delete(reason="Ticket overflow category empty")
+            OVERFLOW.inc(action="folded")
+        except discord.HTTPException as e:
+            log.warning("Could not fold ticket category %s: %s", category_id, e)
+
+    def _fold_done(self, category_id: int, task: asyncio.Task):
+        self._folding.pop(category_id, None)
+        if not task.cancelled() and task.exception() is not None:
+            log.error("Folding ticket category %s failed", category_id, exc_info=task.exception())
+
+
+CATEGORY_POOL = CategoryPool()
@@ -0,0 +1,120 @@
+# channel_writes.py
+import asyncio
+import logging
+import time
+from collections import deque
+
+import discord
+
+from config import RENAME_LIMIT, RENAME_WINDOW
+from metrics import Counter, Gauge, Histogram
+
+log = logging.getLogger(__name__)
+
+WRITE_WAIT = Histogram("channel_write_wait_seconds", "Time a channel write waited for its bucket", ["bucket"],
+                       buckets=(0.1, 0.5, 1, 5, 30, 60, 120, 300, 600))
+WRITES = Counter("channel_writes_total", "Channel writes by bucket and outcome (applied, merged, dropped, failed)",
+                 ["bucket", "result"])
+PENDING = Gauge("channel_writes_pending", "Channels with a queued write", ["bucket"])
+
+
+class ChannelWrites:
+    """
+    Per-channel write scheduler for ticket renames and permission changes.
+
+    Callers state the desired end state and return at once; a background task
+    per (channel, bucket) applies it. Writes that arrive while one is pending
+    are merged into the latest desired state, so a ticket closed and reopened
+    twice in a minute costs at most the renames Discord allows. Renames are
+    held back by our own per-channel budget (RENAME_LIMIT per RENAME_WINDOW),
+    so no task ever sits in discord.py's rate limiter for minutes; permission
+    overwrites use a separate, generous bucket and are never delayed by renames.
+    """
+
+    def __init__(self, rename_limit: int = RENAME_LIMIT, rename_window: float = RENAME_WINDOW):
+        self.rename_limit = rename_limit
+        self.rename_window = rename_window
+        self._names = {}     # channel_id -> desired name
+        self._perms = {}     # channel_id -> {target: PermissionOverwrite}
+        self._renamed = {}   # channel_id -> deque of rename times (monotonic)
+        self._queued = {}    # (channel_id, bucket) -> when the oldest pending write arrived
+        self._tasks = {}     # (channel_id, bucket) -> task
+
+    # ---------- Desired state ----------
+    def rename(self, channel: discord.TextChannel, name: str):
+        if channel.id in self._names:
+            WRITES.inc(bucket="rename", result="merged")
+        self._names[channel.id] = name
+        self._kick(channel, "rename", self._apply_rename)
+
+    def set_permissions(self, channel: discord.TextChannel, target, overwrite: discord.PermissionOverwrite):
+        perms = self._perms.setdefault(channel.id, {})
+        if target in perms:
+            WRITES.inc(bucket="permissions", result="merged")
+        perms[target] = overwrite
+        self._kick(channel, "permissions", self._apply_permissions)
+
+    def rename_delay(self, channel_id: int) -> float:
+        """Seconds until `channel_id` may be renamed again (0 when the budget allows it now)."""
+        done = self._renamed.get(channel_id)
+        if not done:
+            return 0.0
+        now = time.monotonic()
+        while done and now - done[0] >= self.rename_window:
+            done.popleft()
+        return done[0] + self.rename_window - now if len(done) >= self.rename_limit else 0.0
+
+    def pending(self, channel_id: int) -> bool:
+        return channel_id in self._names or channel_id in self._perms
+
+    # ---------- Workers ----------
+    def _kick(self, channel, bucket: str, apply):
+        key = (channel.id, bucket)
+        self._queued.setdefault(key, time.monotonic())
+        if key not in self._tasks:
+            self._tasks[key] = asyncio.create_task(self._run(channel, bucket, apply),
+                                                   name=f"channel-writes-{channel.id}-{bucket}")
+            PENDING.set(sum(1 for _, b in self._tasks if b == bucket), bucket=bucket)
+
+    async def _run(self, channel, bucket: str, apply):
+        try:
+            await apply(channel)
+        except discord.NotFound:
+            WRITES.inc(bucket=bucket, result="dropped")  # channel deleted meanwhile
+        except Exception:
+            WRITES.inc(bucket=bucket, result="failed")
+            log.exception("Channel %s: %s write failed", channel.id, bucket)
+        finally:
+            (self._names if bucket == "rename" else self._perms).pop(channel.id, None)
+            self._queued.pop((channel.id, bucket), None)
+            del self._tasks[(channel.id, bucket)]
+            PENDING.set(sum(1 for _, b in self._tasks if b == bucket), bucket=bucket)
+
+    def _waited(self, channel_id: int, bucket: str):
+        WRITE_WAIT.observe(time.monotonic() - self._queued.pop((channel_id, bucket)), bucket=bucket)
+
+    async def _apply_rename(self, channel):
+        while channel.id in self._names:
+            delay = self.rename_delay(channel.id)
+            if delay:
+                await asyncio.sleep(delay)
+                continue  # the desired name may have changed (or been merged) meanwhile
+            name = self._names.pop(channel.id)
+            self._waited(channel.id, "rename")
+            if name == channel.name:
+                WRITES.inc(bucket="rename", result="dropped")  # toggled back before it was applied
+                continue
+            self._renamed.setdefault(channel.id, deque()).append(time.monotonic())
+            await channel.edit(name=name)
+            WRITES.inc(bucket="rename", result="applied")
+
+    async def _apply_permissions(self, channel):
+        while channel.id in self._perms:
+            perms = self._perms.pop(channel.id)
+            self._waited(channel.id, "permissions")
+            for target, overwrite in perms.items():
+                await channel.set_permissions(target, overwrite=overwrite)
+                WRITES.inc(bucket="permissions", result="applied")
+
+
+CHANNEL_WRITES = ChannelWrites()
@@ -11,6 +11,54 @@ CATEGORY_TICKET_ID = 1421881156114055228
 ROLE_OWNER = 1415425101523980339
 ROLE_MODERATOR = 1421663558114086924
 ROLE_STAFF = 1421663242161491968
+ROLE_VERIFIED = 1423395296917983444  # hidden from ticket channels
 
 # Ticket prefix (e.g. "ticket" → channel name: ticket-username)
 TICKET_PREFIX = "ticket"
+
+# Live price file (overrides *_data.py, reloaded by /reprice or when the file changes)
+PRICES_FILE = "prices.json"
+PRICES_WATCH_SECONDS = 10
+
+# Local SQLite database (message capture, ticket state, order ledger)
+DB_PATH = "bot.db"
+
+# Long transcript backfills: id windows fetched in parallel, and how many at once
+HISTORY_FETCH_WINDOWS = 8
+HISTORY_FETCH_CONCURRENCY = 4
+
+# Ticket creation runs on a small worker pool after the click is acknowledged
+JOB_WORKERS = 4
+JOB_QUEUE_SIZE = 100
+JOB_RETRIES = 3  # extra attempts for the order message after a 429 (channel creation is never retried)
+
+# Health / metrics HTTP server (UptimeRobot pings "/")
+HEALTH_HOST = "0.0.0.0"
+HEALTH_PORT = 8080
+
+# Event loop monitor: how often lag is sampled, and how long a blocking callback may run before it's logged
+LOOP_MONITOR_INTERVAL = 0.5
+SLOW_CALLBACK_SECONDS = 0.1
+
+# Discord allows two channel renames per channel per 10 minutes; later renames are queued and coalesced
+RENAME_LIMIT = 2
+RENAME_WINDOW = 600
+
+# Order ledger: rows are written in batches by a background writer
+ORDER_BATCH_SIZE = 50
+ORDER_FLUSH_SECONDS = 1.0
+
+# Idle ticket reaper: close open tickets idle this long, delete closed ones (transcript archived first) after retention
+TICKET_IDLE_CLOSE_HOURS = 72
+TICKET_CLOSED_RETENTION_HOURS = 168
+REAPER_INTERVAL = 600  # seconds between sweeps
+REAPER_BATCH = 5       # tickets handled per sweep at most
+REAPER_SPACING = 2.0   # seconds between two reaper operations
+REAP_ADOPTED_TICKETS = False  # also reap tickets the bot found at startup instead of opening itself
+
+# Ticket categories: Discord caps a category at 50 channels; full ones overflow into "Tickets 2", "Tickets 3", ...
+CATEGORY_CHANNEL_LIMIT = 50
+CATEGORY_FOLD_DELAY = 60  # seconds an overflow category must stay empty before it is deleted
+# Optional per-service categories, e.g. {"quest": "Quest Tickets", "bossing": "Bossing Tickets"}
+# (services: quest, leveling, bossing, minigames); services not listed use the main ticket category
+TICKET_CATEGORY_SHARDS = {}
@@ -0,0 +1,176 @@
+# dispatch.py
+import asyncio
+import logging
+from collections import namedtuple
+
+import discord
+
+from instrumentation import instrumented
+from ticket_service import is_staff
+
+log = logging.getLogger(__name__)
+
+# Routes with defer=True that haven't answered by then get a "thinking..." defer
+DEFER_AFTER = 2.0
+
+Route = namedtuple("Route", "key handler checks defer ephemeral")
+PanelEntry = namedtuple("PanelEntry", "custom_id label summary position")
+
+
+def route_key(custom_id: str) -> str:
+    """'ticket:close:123' -> 'ticket:close', 'btn_leveling' -> 'btn_leveling'."""
+    return ":".join(custom_id.split(":", 2)[:2])
+
+
+def route_arg(interaction: discord.Interaction) -> str:
+    """What follows the route key: 'ticket:close:123' -> '123'."""
+    return interaction.data["custom_id"].split(":", 2)[2]
+
+
+# ---------- Middleware ----------
+# A check gets the interaction and returns None to let it through, or the
+# message to show the user (ephemerally) when it is refused.
+def staff_only(message: str = "Only staff can do that."):
+    def check(interaction: discord.Interaction):
+        return None if is_staff(interaction.user) else message
+    return check
+
+
+class ResponseGate:
+    """
+    Decides who sends the first response when a handler races the timed defer.
+    response.is_done() only turns true once that HTTP call has returned, so
+    both sides take the lock and check `answered` instead.
+    """
+
+    __slots__ = ("lock", "answered")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.answered = False
+
+
+# interaction id -> ResponseGate while a defer=True route runs
+_gates = {}
+
+
+async def reply(interaction: discord.Interaction, content=None, **kwargs):
+    """Answer through the response if it is still open, else as a followup (after a defer)."""
+    gate = _gates.get(interaction.id)
+    if gate is None:
+        if interaction.response.is_done():
+            return await interaction.followup.send(content, **kwargs)
+        return await interaction.response.send_message(content, **kwargs)
+    async with gate.lock:
+        if gate.answered:
+            return await interaction.followup.send(content, **kwargs)
+        result = await interaction.response.send_message(content, **kwargs)
+        gate.answered = True
+        return result
+
+
+# ---------- Router ----------
+class Router:
+    """
+    custom_id -> handler table for components that don't belong to a view
+    (the /panel buttons and anything a panel registers). Panels register
+    themselves next to their handler instead of growing an if/elif chain in
+    main.py, and checks, deferral and error replies live in one place. Ids it
+    doesn't know (DynamicItems, views) are left to discord.py, so no click is
+    handled twice.
+    """
+
+    def __init__(self):
+        self.routes = {}
+        self.panels = []
+
+    def route(self, key: str, *, checks=(), defer: bool = False, ephemeral: bool = True):
+        """
+        Register `handler(interaction)` for custom_ids starting with `key`
+        ('btn_leveling', or 'ticket:close' for 'ticket:close:<owner>'); timed per handler.
+        """
+        def decorator(handler):
+            if key in self.routes:
+                raise ValueError(f"route {key!r} is already registered")
+            self.routes[key] = Route(key, instrumented(handler), tuple(checks), defer, ephemeral)
+            return handler
+        return decorator
+
+    def panel(self, key: str, label: str, summary: str, *, position: int, **options):
+        """route() that also puts a button (and an embed line) on /panel."""
+        self.panels.append(PanelEntry(key, label, summary, position))
+        self.panels.sort(key=lambda p: p.position)
+        return self.route(key, **options)
+
+    def resolve(self, custom_id: str):
+        return self.routes.get(route_key(custom_id))
+
+    async def dispatch(self, interaction: discord.Interaction) -> bool:
+        """Run the route for a component interaction. Returns False if none matches."""
+        route = self.resolve(interaction.data.get("custom_id", ""))
+        if route is None:
+            return False
+
+        try:
+            for check in route.checks:
+                refusal = check(interaction)
+                if refusal:
+                    await interaction.response.send_message(refusal, ephemeral=True)
+                    return True
+            if route.defer:
+                await self._with_defer(route, interaction)
+            else:
+                await route.handler(interaction)
+        except Exception:
+            log.exception("Route %r failed for %s", route.key, interaction.data.get("custom_id"))
+            try:
+                await reply(interaction, "⚠️ Something went wrong, please try again.", ephemeral=True)
+            except discord.HTTPException:
+                pass
+        return True
+
+    async def _with_defer(self, route: Route, interaction: discord.Interaction):
+        """Run the handler; if it's still busy after DEFER_AFTER, defer so the 3 s deadline is kept."""
+        gate = _gates[interaction.id] = ResponseGate()
+        try:
+            task = asyncio.ensure_future(route.handler(interaction))
+            done, _ = await asyncio.wait({task}, timeout=DEFER_AFTER)
+            if not done:
+                async with gate.lock:
+                    if not gate.answered:
+                        await interaction.response.defer(ephemeral=route.ephemeral, thinking=True)
+                        gate.answered = True
+            await task  # handlers on deferrable routes answer with reply()
+        finally:
+            _gates.pop(interaction.id, None)
+
+
+ROUTER = Router()
+
+
+# ---------- Routed components ----------
+class RoutedButton(discord.ui.Button):
+    """Render-only button: clicks reach ROUTER through on_interaction, not the view store."""
+
+    def is_dispatchable(self) -> bool:
+        return False
+
+
+class RoutedView(discord.ui.View):
+    """A message's RoutedButtons. Never stored per message, so it survives restarts."""
+
+    def __init__(self, *buttons):
+        super().__init__(timeout=None)
+        for button in buttons:
+            self.add_item(button)
+
+    def is_dispatchable(self) -> bool:
+        return False
+
+
+class PanelView(RoutedView):
+    """/panel buttons, one per registered panel route."""
+
+    def __init__(self):
+        super().__init__(*(RoutedButton(label=e.label, style=discord.ButtonStyle.primary, custom_id=e.custom_id)
+                           for e in ROUTER.panels))
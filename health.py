@@ -0,0 +1,72 @@
+# health.py
+import math
+
+from aiohttp import web
+
+from metrics import Gauge, render as render_metrics
+
+CONNECTED = Gauge("discord_gateway_connected", "1 while the gateway session is up")
+LATENCY = Gauge("discord_gateway_latency_seconds", "Gateway heartbeat latency")
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class HealthServer:
+    """
+    Uptime, readiness and metrics endpoints served by aiohttp on the bot's own
+    event loop (no extra thread or web stack):
+      /         plain "I'm alive!" for uptime pingers
+      /healthz  gateway connected + heartbeat latency
+      /readyz   slash commands synced and persistent components registered
+      /metrics  Prometheus text format
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.commands_synced = False
+        self.components_registered = False
+        self._runner = None
+        self.app = web.Application()
+        self.app.add_routes([
+            web.get("/", self.alive),
+            web.get("/healthz", self.healthz),
+            web.get("/readyz", self.readyz),
+            web.get("/metrics", self.metrics),
+        ])
+
+    async def start(self, host: str, port: int):
+        if self._runner is None:
+            self._runner = web.AppRunner(self.app, access_log=None)
+            await self._runner.setup()
+            await web.TCPSite(self._runner, host, port).start()
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    # ---------- Probes ----------
+    def gateway(self):
+        """(connected, latency in seconds or None)"""
+        connected = self.bot.is_ready() and not self.bot.is_closed()
+        latency = self.bot.latency
+        return connected, latency if math.isfinite(latency) else None
+
+    async def alive(self, request):
+        return web.Response(text="I'm alive!")
+
+    async def healthz(self, request):
+        connected, latency = self.gateway()
+        body = {"status": "ok" if connected else "disconnected", "latency_ms": latency and round(latency * 1000, 1)}
+        return web.json_response(body, status=200 if connected else 503)
+
+    async def readyz(self, request):
+        checks = {"commands_synced": self.commands_synced, "components_registered": self.components_registered}
+        ready = all(checks.values())
+        return web.json_response({"status": "ready" if ready else "not ready", **checks}, status=200 if ready else 503)
+
+    async def metrics(self, request):
+        connected, latency = self.gateway()
+        CONNECTED.set(int(connected))
+        if latency is not None:
+            LATENCY.set(latency)
+        return web.Response(text=render_metrics(), headers={"Content-Type": PROMETHEUS_CONTENT_TYPE})
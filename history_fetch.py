@@ -0,0 +1,87 @@
+# history_fetch.py
+import asyncio
+
+import discord
+
+from config import HISTORY_FETCH_CONCURRENCY, HISTORY_FETCH_WINDOWS
+
+PAGE_SIZE = 100  # messages per history request (Discord's maximum)
+RETRIES = 3
+
+
+def split_range(after: int, through: int, windows: int):
+    """
+    Split the snowflake range (after, through] into up to `windows` contiguous
+    (after, through] windows. Snowflakes grow with time, so equal id spans are
+    equal slices of the channel's lifetime.
+    """
+    span = through - after
+    windows = max(1, min(windows, span))
+    bounds = [after + span * i // windows for i in range(windows)] + [through]
+    return list(zip(bounds, bounds[1:]))
+
+
+class FetchGate:
+    """
+    Concurrency limit for history requests. Every 429 that reaches us permanently
+    gives up one slot (never below one), so a busy bucket gets fewer callers.
+    """
+
+    def __init__(self, slots: int):
+        self.slots = slots
+        self._sem = asyncio.Semaphore(slots)
+
+    async def __aenter__(self):
+        await self._sem.acquire()
+
+    async def __aexit__(self, *exc):
+        self._sem.release()
+
+    async def throttle(self):
+        if self.slots > 1:
+            self.slots -= 1
+            await self._sem.acquire()  # never released
+
+
+async def _fetch_window(channel, after: int, through: int, gate: FetchGate, store):
+    """Page through one window oldest-first, resuming after the last stored message on retry."""
+    for attempt in range(RETRIES + 1):
+        try:
+            async with gate:
+                page = []
+                history = channel.history(limit=None, after=discord.Object(id=after),
+                                          before=discord.Object(id=through + 1), oldest_first=True)
+                async for msg in history:
+                    page.append(msg)
+                    if len(page) == PAGE_SIZE:
+                        store(page)
+                        after = page[-1].id
+                        page = []
+                store(page)
+                return
+        except discord.HTTPException as e:
+            if attempt == RETRIES or not (e.status == 429 or e.status >= 500):
+                raise
+            if e.status == 429:
+                await gate.throttle()
+            await asyncio.sleep(2 ** attempt)
+
+
+async def fetch_range(channel, after: int, through: int, store, advance, *,
+                      windows: int = HISTORY_FETCH_WINDOWS, concurrency: int = HISTORY_FETCH_CONCURRENCY):
+    """
+    Fetch every message in (after, through] with up to `concurrency` windows in
+    flight. `store(messages)` gets each page as it arrives (any window order);
+    `advance(message_id)` is only called once everything up to that id is stored,
+    so a failure part-way never leaves a hole below the watermark.
+    """
+    parts = split_range(after, through, windows)
+    gate = FetchGate(concurrency)
+    tasks = [asyncio.ensure_future(_fetch_window(channel, lo, hi, gate, store)) for lo, hi in parts]
+    try:
+        for (_, hi), task in zip(parts, tasks):  # merge in id order
+            await task
+            advance(hi)
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,131 @@
+# instrumentation.py
+import contextvars
+import functools
+import logging
+import time
+
+import discord
+from discord.webhook.async_ import AsyncWebhookAdapter
+
+from metrics import Counter, Histogram
+
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2, 3, 5, 10, 30)
+
+HANDLER_SECONDS = Histogram("handler_seconds", "Callback run time, start to return", ["handler"], LATENCY_BUCKETS)
+FIRST_RESPONSE_SECONDS = Histogram("handler_first_response_seconds",
+                                   "Interaction creation to the handler's first response", ["handler"], LATENCY_BUCKETS)
+HANDLER_ERRORS = Counter("handler_errors_total", "Callbacks that raised", ["handler"])
+REST_CALLS = Counter("discord_rest_requests_total", "Discord API requests by handler and route", ["handler", "route"])
+RATE_LIMITED = Counter("discord_rate_limited_total", "429 responses that discord.py waited out and retried", ["scope"])
+
+# The callback currently running in this task, used to attribute REST calls and responses
+current_handler = contextvars.ContextVar("current_handler", default="background")
+
+
+def handler_name(func) -> str:
+    """'bossing_panel.CreateTicketButton.callback'"""
+    return f"{func.__module__}.{func.__qualname__}"
+
+
+def instrumented(func):
+    """
+    Time an interaction callback (view button/select, modal on_submit, route or
+    slash command) and attribute its REST calls and first response to it.
+    """
+    name = handler_name(func)
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        token = current_handler.set(name)
+        started = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        except Exception:
+            HANDLER_ERRORS.inc(handler=name)
+            raise
+        finally:
+            HANDLER_SECONDS.observe(time.perf_counter() - started, handler=name)
+            current_handler.reset(token)
+
+    return wrapper
+
+
+# ---------- Hooks ----------
+def _route_label(route) -> str:
+    return f"{route.method} {route.path}"
+
+
+def _count_rest(request):
+    @functools.wraps(request)
+    async def wrapper(self_or_route, *args, **kwargs):
+        route = self_or_route if hasattr(self_or_route, "path") else args[0]
+        REST_CALLS.inc(handler=current_handler.get(), route=_route_label(route))
+        return await request(self_or_route, *args, **kwargs)
+    return wrapper
+
+
+def _time_first_response(method):
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        first = not self.is_done()
+        result = await method(self, *args, **kwargs)
+        if first:
+            elapsed = (discord.utils.utcnow() - self._parent.created_at).total_seconds()
+            FIRST_RESPONSE_SECONDS.observe(elapsed, handler=current_handler.get())
+        return result
+    return wrapper
+
+
+class RateLimitCounter(logging.Handler):
+    """Counts discord.py's 'rate limited, retrying' warnings (it handles the 429 itself)."""
+
+    def emit(self, record: logging.LogRecord):
+        message = record.msg if isinstance(record.msg, str) else ""
+        if "Global rate limit" in message:
+            RATE_LIMITED.inc(scope="global")
+        elif "rate limited" in message:
+            RATE_LIMITED.inc(scope="webhook" if record.name.startswith("discord.webhook") else "route")
+
+
+_installed = False
+
+
+def install(bot):
+    """Hook REST accounting, first-response timing and 429 counting into discord.py (once)."""
+    global _installed
+    if _installed:
+        return
+    _installed = True
+
+    # bot REST calls, then interaction callbacks and followups (they go through the webhook adapter)
+    bot.http.request = _count_rest(bot.http.request)
+    AsyncWebhookAdapter.request = _count_rest(AsyncWebhookAdapter.request)
+    for name in ("defer", "send_message", "edit_message", "send_modal"):
+        setattr(discord.InteractionResponse, name, _time_first_response(getattr(discord.InteractionResponse, name)))
+
+    counter = RateLimitCounter(logging.WARNING)
+    for logger in ("discord.http", "discord.webhook.async_"):
+        logging.getLogger(logger).addHandler(counter)
+
+
+# ---------- Summary (/stats) ----------
+def handler_stats():
+    """[(handler, calls, p50, p95, p99, first-response p95, rest calls, errors)], busiest first."""
+    rest = {}
+    for (handler, _), n in REST_CALLS.values.items():
+        rest[handler] = rest.get(handler, 0) + n
+    rows = []
+    for (handler,) in list(HANDLER_SECONDS.series):
+        _, _, count = HANDLER_SECONDS.snapshot(handler=handler)
+        rows.append((
+            handler,
+            count,
+            HANDLER_SECONDS.quantile(0.5, handler=handler),
+            HANDLER_SECONDS.quantile(0.95, handler=handler),
+            HANDLER_SECONDS.quantile(0.99, handler=handler),
+            FIRST_RESPONSE_SECONDS.quantile(0.95, handler=handler),
+            rest.get(handler, 0),
+            HANDLER_ERRORS.get(handler=handler),
+        ))
+    rows.sort(key=lambda r: r[1], reverse=True)
+    return rows
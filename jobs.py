@@ -0,0 +1,130 @@
+# jobs.py
+import asyncio
+import logging
+import time
+
+import discord
+
+from config import JOB_QUEUE_SIZE, JOB_RETRIES, JOB_WORKERS
+from instrumentation import current_handler
+from metrics import Counter, Gauge, Histogram
+
+log = logging.getLogger(__name__)
+
+QUEUE_DEPTH = Gauge("ticket_job_queue_depth", "Ticket jobs waiting for a worker")
+JOBS = Counter("ticket_jobs_total", "Ticket jobs by outcome", ["result"])
+JOB_SECONDS = Histogram("ticket_job_seconds", "Time from submit to job completion",
+                        buckets=(0.25, 0.5, 1, 2, 3, 5, 10, 30, 60))
+ACK_SECONDS = Histogram("interaction_ack_seconds", "Time from interaction creation to our first response",
+                        ["kind"], buckets=(0.1, 0.25, 0.5, 1, 1.5, 2, 2.5, 3, 5))
+RETRIES = Counter("rest_retries_total", "REST calls retried after a transient failure")
+
+
+class QueueFull(Exception):
+    """Too many ticket jobs are already waiting."""
+
+
+def transient(error: Exception) -> bool:
+    """
+    A 429 that discord.py gave up waiting out: the request was refused, so it
+    is safe to send again. A 5xx, timeout or dropped connection may still have
+    gone through (and discord.py already retried 500/502/504 itself).
+    """
+    return isinstance(error, discord.HTTPException) and error.status == 429
+
+
+async def with_retries(func, *args, retries: int = JOB_RETRIES, **kwargs):
+    """await func(*args, **kwargs), retrying transient() failures with 1 s, 2 s, 4 s ... backoff."""
+    for attempt in range(retries + 1):
+        try:
+            return await func(*args, **kwargs)
+        except Exception as e:
+            if attempt == retries or not transient(e):
+                raise
+            RETRIES.inc()
+            log.warning("Retrying %s after %r (attempt %d)", getattr(func, "__qualname__", func), e, attempt + 1)
+            await asyncio.sleep(2 ** attempt)
+
+
+def observe_ack(interaction: discord.Interaction, kind: str):
+    """Record how long the interaction waited for its first response."""
+    ACK_SECONDS.observe((discord.utils.utcnow() - interaction.created_at).total_seconds(), kind=kind)
+
+
+# ---------- Worker pool ----------
+class JobQueue:
+    """
+    Bounded queue of slow ticket work (channel creation, posting the order)
+    run by a fixed pool of workers, so a burst of orders can't pile up
+    unbounded REST calls. Workers start on first use.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS, maxsize: int = JOB_QUEUE_SIZE):
+        self.workers = workers
+        self.maxsize = maxsize
+        self._queue = None
+        self._tasks = []
+
+    def _ensure_started(self):
+        if self._queue is None:
+            self._queue = asyncio.Queue(self.maxsize)
+            self._tasks = [asyncio.create_task(self._worker(), name=f"ticket-worker-{i}") for i in range(self.workers)]
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    async def run(self, job):
+        """Queue `job()` (a coroutine function) and wait for its result. Raises QueueFull when saturated."""
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((job, future, time.perf_counter(), current_handler.get()))
+        except asyncio.QueueFull:
+            JOBS.inc(result="rejected")
+            raise QueueFull from None
+        QUEUE_DEPTH.set(self.depth)
+        return await future
+
+    async def _worker(self):
+        while True:
+            job, future, queued, handler = await self._queue.get()
+            QUEUE_DEPTH.set(self.depth)
+            token = current_handler.set(handler)  # REST calls count against the submitting handler
+            try:
+                result = await job()
+            except Exception as e:
+                JOBS.inc(result="failed")
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                JOBS.inc(result="ok")
+                if not future.done():
+                    future.set_result(result)
+            finally:
+                current_handler.reset(token)
+                JOB_SECONDS.observe(time.perf_counter() - queued)
+                self._queue.task_done()
+
+
+TICKET_JOBS = JobQueue()
+
+
+async def defer_then_run(interaction: discord.Interaction, job, done):
+    """
+    Acknowledge the interaction right away (ephemeral "thinking..."), run `job`
+    on the ticket worker pool and finish with a followup built by done(result).
+    """
+    await interaction.response.defer(ephemeral=True, thinking=True)
+    observe_ack(interaction, "deferred")
+    try:
+        result = await TICKET_JOBS.run(job)
+    except QueueFull:
+        await interaction.followup.send("⏳ We're handling a lot of orders right now, please try again in a minute.",
+                                        ephemeral=True)
+        return
+    except Exception:
+        log.exception("Ticket job failed")
+        await interaction.followup.send("⚠️ Couldn't create your ticket, please try again.", ephemeral=True)
+        return
+    await interaction.followup.send(done(result), ephemeral=True)
@@ -1,23 +1,34 @@
 # leveling_panel_v4.py
+from collections import namedtuple
+
 import discord
-from discord.ui import View, Select, Modal, TextInput, Button
-from leveling_data import LEVELING_RATES
-from config import CATEGORY_TICKET_ID, ROLE_OWNER, ROLE_MODERATOR, ROLE_STAFF, TICKET_PREFIX
+from discord.ui import View, Select, Modal, TextInput, Button, DynamicItem
+from ticket_service import open_ticket
+from ticket_controls import TicketControlView
+from dispatch import ROUTER
+from jobs import defer_then_run
+from instrumentation import instrumented
+from xp_table import MAX_LEVEL, MAX_XP, xp_to_level, level_to_xp
+from leveling_pricing import engine_for
+from order_ledger import Order
+from catalog import ITEM_REF_RE, catalog_at, current_catalog, fmt_pkr, fmt_usd, fmt_pkr_total, fmt_usd_total
 
 # ---------- Helpers ----------
-def xp_to_level(xp: int):
-    """Approximate OSRS level from total XP using standard formula."""
-    points = 0
-    for lvl in range(1, 100):
-        points += int(lvl + 300 * 2 ** (lvl / 7.0))
-        if xp < points / 4:
-            return lvl
-    return 99
+MODAL_TIMEOUT = 600
+LEVEL_PREFIXES = ("level", "lvl", "lv")
 
 
 def parse_xp_input(value: str) -> int:
-    """Accept '100k', '1.5m', '123456' etc. Returns int XP or raises ValueError."""
+    """
+    Accept '100k', '1.5m', '123456' etc. Returns int XP or raises ValueError.
+    Levels are accepted too: 'lvl 70', 'level 70' or a bare '70' (1-99) map to that level's XP.
+    """
     v = value.lower().replace(",", "").strip()
+    for prefix in LEVEL_PREFIXES:
+        if v.startswith(prefix):
+            return level_to_xp(int(v[len(prefix):].strip()))
+    if v.isdigit() and 1 <= int(v) <= MAX_LEVEL:
+        return level_to_xp(int(v))
     if v.endswith("m"):
         return int(float(v[:-1]) * 1_000_000)
     if v.endswith("k"):
@@ -29,6 +40,14 @@ def pretty_num(n: int) -> str:
     return f"{n:,}"
 
 
+def format_breakdown(quote) -> str:
+    """One line per bracket the quote crosses, e.g. 'Woodcutting 1-15: 2,411 XP × 5 PKR → 121 PKR'."""
+    return "\n".join(
+        f"{line.label}: {pretty_num(line.end_xp - line.start_xp)} XP × {fmt_pkr(line.rate_pkr)} PKR → {fmt_pkr_total(line.pkr)} PKR"
+        for line in quote.lines
+    )[:1024]
+
+
 # ---------- Core skill list (23) ----------
 CORE_SKILLS = [
     "Attack", "Strength", "Defence", "Ranged", "Prayer", "Magic", "Hitpoints",
@@ -38,152 +57,186 @@ CORE_SKILLS = [
 ]
 
 # ---------- Data extraction ----------
-def extract_skill_data(skill_name: str) -> dict:
+COMBAT_SKILLS = {"Attack", "Strength", "Defence", "Ranged", "Magic", "Hitpoints"}
+# shared combat methods listed under every combat skill
+COMBAT_KEYWORDS = ("monkey madness", "crabs", "nightmare zone", "nmz", "bursting", "chinning")
+
+SkillPage = namedtuple("SkillPage", "data options embed")
+
+
+def _scan_skill(skill_name: str, catalog) -> dict:
+    """{entry_name: (pkr_minor, usd_minor)} for one skill, combat methods included, sorted by name."""
+    skill_lower = skill_name.lower()
+    combat = skill_name in COMBAT_SKILLS
+    res = {}
+    for key, pkr, usd in catalog.leveling.items():
+        kl = key.lower()
+        if kl.startswith(skill_lower) or (combat and any(w in kl for w in COMBAT_KEYWORDS)):
+            res[key] = (pkr, usd)
+    return dict(sorted(res.items()))
+
+
+def _range_options(data: dict, catalog):
+    options = []
+    for k, (pkr, _) in data.items():
+        # Keep labels under 100 chars — safe for Discord select
+        label = k if len(k) <= 100 else k[:97] + "..."
+        options.append(discord.SelectOption(label=label, value=catalog.leveling.ref(k),
+                                            description=f"{fmt_pkr(pkr)} PKR per 100 XP"))
+    # Discord limits: 1-25 options; if data is >25 (rare), slice and show warning option
+    if not options:
+        options = [discord.SelectOption(label="⚠️ No ranges available", value="none")]
+    if len(options) > 25:
+        options = options[:24] + [discord.SelectOption(label="⚠️ More ranges available (see website)", value="more")]
+    return tuple(options)
+
+
+def _rate_card(skill: str, data: dict) -> discord.Embed:
+    embed = discord.Embed(
+        title=f"⚔️ {skill} Leveling Rates",
+        description=f"Select the desired rate / XP bracket for **{skill}** from the dropdown below.",
+        color=discord.Color.teal()
+    )
+    # Group similar names: show friendly label
+    for name, (pkr, usd) in data.items():
+        label = name.replace(skill, "").strip() or name
+        embed.add_field(name=label, value=f"💰 {fmt_pkr(pkr)} PKR ({fmt_usd(usd)}) per 100 XP", inline=False)
+    embed.set_footer(text="After selecting a bracket you will enter From/To XP to get a final estimate.")
+    return embed
+
+
+def skill_index(catalog) -> dict:
+    """
+    skill -> SkillPage(entries, range options, rate card) for a catalog snapshot,
+    built on first use and cached on it, so picking a skill is a dict lookup.
+    The embeds and options are shared: send them, don't modify them.
+    """
+    index = catalog.cache.get("leveling_skills")
+    if index is None:
+        index = {}
+        for skill in CORE_SKILLS:
+            data = _scan_skill(skill, catalog)
+            index[skill] = SkillPage(data, _range_options(data, catalog), _rate_card(skill, data))
+        catalog.cache["leveling_skills"] = index
+    return index
+
+
+def extract_skill_data(skill_name: str, catalog=None) -> dict:
     """
-    Return {entry_name: (pkr, usd)} for entries that belong to given skill_name.
+    Return {entry_name: (pkr_minor, usd_minor)} for entries that belong to given skill_name.
     Also group combat-related methods (Monkey Madness, Crabs, NMZ) under combat skills.
     """
-    res = {}
-    skill_lower = skill_name.lower()
-    for key, val in LEVELING_RATES.items():
-        if key.lower().startswith(skill_lower):
-            res[key] = val
-
-    # For combat skills: show shared combat methods
-    if skill_name in {"Attack", "Strength", "Defence", "Ranged", "Magic", "Hitpoints"}:
-        for key, val in LEVELING_RATES.items():
-            kl = key.lower()
-            if "monkey madness" in kl or "rock/sand crabs" in kl or "crabs" in kl or "nightmare zone" in kl or "nmz" in kl:
-                res[key] = val
-            # some combat entries might be 'Magic (Bursting)' style; include those too
-            if "bursting" in kl or "chinning" in kl:
-                res[key] = val
-    return dict(sorted(res.items()))
+    page = skill_index(catalog or current_catalog()).get(skill_name)
+    return page.data if page else {}
 
 
 # ---------- Start View & Skill select ----------
-class SkillSelect(Select):
-    def __init__(self, user: discord.User):
-        options = [
-            discord.SelectOption(label=s, description=f"View leveling rates for {s}")
-            for s in CORE_SKILLS
-        ]
-        super().__init__(placeholder="Select a skill to view leveling prices...", options=options, min_values=1, max_values=1)
-        self.user = user
-
+# Every component below is a DynamicItem: its state (owner, skill, catalog
+# version, item, XP range) is encoded in the custom_id, so nothing is kept per
+# message and an estimate's button still works after a restart.
+EXPIRED = "⌛ This estimate has expired (prices changed). Please start again from the panel."
+SKILL_OPTIONS = tuple(
+    discord.SelectOption(label=s, description=f"View leveling rates for {s}")
+    for s in CORE_SKILLS
+)
+
+
+class SkillSelect(DynamicItem[Select], template=r"lv:skill"):
+    def __init__(self):
+        super().__init__(Select(placeholder="Select a skill to view leveling prices...", options=list(SKILL_OPTIONS),
+                                min_values=1, max_values=1, custom_id="lv:skill"))
+
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls()
+
+    @instrumented
     async def callback(self, interaction: discord.Interaction):
-        skill = self.values[0]
-        data = extract_skill_data(skill)
-        if not data:
+        skill = self.item.values[0]
+        catalog = current_catalog()
+        page = skill_index(catalog).get(skill)
+        if not page or not page.data:
             await interaction.response.send_message(f"⚠️ No pricing data found for **{skill}**.", ephemeral=True)
             return
 
-        # Build a stylish embed (similar style to quest panel)
-        embed = discord.Embed(
-            title=f"⚔️ {skill} Leveling Rates",
-            description=f"Select the desired rate / XP bracket for **{skill}** from the dropdown below.",
-            color=discord.Color.teal()
-        )
-        # Group similar names: show friendly label
-        for name, (pkr, usd) in data.items():
-            label = name.replace(skill, "").strip()
-            if not label:
-                label = name
-            embed.add_field(name=label, value=f"💰 {pkr} PKR ({usd}) per 100 XP", inline=False)
-
-        embed.set_footer(text="After selecting a bracket you will enter From/To XP to get a final estimate.")
-        await interaction.response.edit_message(embed=embed, view=RangeSelectView(self.user, skill, data))
+        await interaction.response.edit_message(embed=page.embed, view=RangeSelectView(skill, catalog))
 
 
 class LevelingStartView(View):
     def __init__(self, user: discord.User):
         super().__init__(timeout=None)
-        self.add_item(SkillSelect(user))
+        self.add_item(SkillSelect())
 
 
 # ---------- Range select (shows options for chosen skill and opens modal) ----------
-class RangeSelect(Select):
-    def __init__(self, user: discord.User, skill: str, data: dict):
-        options = []
-        for k, (pkr, _) in data.items():
-            # Keep labels under 100 chars — safe for Discord select
-            label = k if len(k) <= 100 else k[:97] + "..."
-            options.append(discord.SelectOption(label=label, description=f"{pkr} PKR per 100 XP"))
-        # Discord limits: 1-25 options; if data is >25 (rare), slice and show warning option
-        if not options:
-            options = [discord.SelectOption(label="⚠️ No ranges available")]
-        if len(options) > 25:
-            options = options[:24] + [discord.SelectOption(label="⚠️ More ranges available (see website)")]
-        super().__init__(placeholder="Choose a rate / range...", options=options, min_values=1, max_values=1)
-        self.user = user
+class RangeSelect(DynamicItem[Select], template=r"lv:range:(?P<version>\d+):(?P<skill>[A-Za-z]+)"):
+    def __init__(self, skill: str, catalog):
+        page = skill_index(catalog).get(skill)
+        options = list(page.options) if page else [discord.SelectOption(label="⚠️ No ranges available", value="none")]
+        super().__init__(Select(placeholder="Choose a rate / range...", options=options, min_values=1, max_values=1,
+                                custom_id=f"lv:range:{catalog.version}:{skill}"))
         self.skill = skill
-        self.data = data
+        self.catalog = catalog
+
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls(match["skill"], catalog_at(int(match["version"])) or current_catalog())
 
+    @instrumented
     async def callback(self, interaction: discord.Interaction):
-        choice = self.values[0]
-        # find the data matching the selected label (exact key), fallback if not exact
-        matched = None
-        for k in self.data.keys():
-            if k == choice or k.startswith(choice) or choice.startswith(k):
-                matched = k
-                break
-        if not matched:
-            # try fuzzy match
-            for k in self.data.keys():
-                if choice in k:
-                    matched = k
-                    break
+        matched = self.catalog.leveling.resolve(self.item.values[0])
         if not matched:
             await interaction.response.send_message("⚠️ Could not identify selected range. Try again.", ephemeral=True)
             return
 
-        pkr, usd = self.data[matched]
+        pkr, usd = self.catalog.leveling.price(matched)
         # open modal for XP input
-        await interaction.response.send_modal(XPInputModal(self.user, self.skill, matched, pkr, usd))
+        await interaction.response.send_modal(XPInputModal(interaction.user, self.skill, matched, pkr, usd, self.catalog))
 
 
 class RangeSelectView(View):
-    def __init__(self, user: discord.User, skill: str, data: dict):
+    def __init__(self, skill: str, catalog):
         super().__init__(timeout=None)
-        self.add_item(RangeSelect(user, skill, data))
+        self.add_item(RangeSelect(skill, catalog))
 
 
 # ---------- XP Input Modal ----------
 class XPInputModal(Modal, title="Enter From / To XP"):
-    from_xp = TextInput(label="From XP (e.g. 100k or 150000)", style=discord.TextStyle.short)
-    to_xp = TextInput(label="To XP (e.g. 5m or 5000000)", style=discord.TextStyle.short)
+    from_xp = TextInput(label="From XP or level (e.g. 100k or lvl 50)", style=discord.TextStyle.short)
+    to_xp = TextInput(label="To XP or level (e.g. 5m or lvl 70)", style=discord.TextStyle.short)
 
-    def __init__(self, user: discord.User, skill: str, range_label: str, pkr: float, usd: str):
-        super().__init__()
+    def __init__(self, user: discord.User, skill: str, range_label: str, pkr: int, usd: int, catalog):
+        super().__init__(timeout=MODAL_TIMEOUT)  # dismissed modals are dropped instead of kept forever
         self.user = user
         self.skill = skill
         self.range_label = range_label
         self.pkr = pkr
         self.usd = usd
+        self.catalog = catalog
 
+    @instrumented
     async def on_submit(self, interaction: discord.Interaction):
         # parse XP values
         try:
             start = parse_xp_input(self.from_xp.value)
             end = parse_xp_input(self.to_xp.value)
         except Exception:
-            await interaction.response.send_message("❌ Invalid XP values. Use examples like 100k, 1.5m or full numbers.", ephemeral=True)
+            await interaction.response.send_message("❌ Invalid XP values. Use examples like 100k, 1.5m, lvl 70 or full numbers.", ephemeral=True)
             return
 
         if end <= start:
             await interaction.response.send_message("❌ 'To XP' must be larger than 'From XP'.", ephemeral=True)
             return
+        # both values end up in the ticket button's custom_id (digits only, 100 chars max)
+        if start < 0 or end > MAX_XP:
+            await interaction.response.send_message(f"❌ XP must be between 0 and {pretty_num(MAX_XP)}.", ephemeral=True)
+            return
 
         gained = end - start
         lvl_start = xp_to_level(start)
         lvl_end = xp_to_level(end)
-        total_pkr = round((gained / 100) * self.pkr, 2)
-        # try to parse USD from provided usd string, fallback if not numeric
-        try:
-            usd_val = float(str(self.usd).replace("$", ""))
-            total_usd = round((gained / 100) * usd_val, 2)
-        except Exception:
-            total_usd = None
+        # every bracket crossed by the range is billed at its own rate
+        quote = engine_for(self.catalog).quote(self.range_label, start, end)
 
         # Stylish summary embed
         embed = discord.Embed(
@@ -193,96 +246,103 @@ class XPInputModal(Modal, title="Enter From / To XP"):
         embed.add_field(name="XP Range", value=f"{pretty_num(start)} → {pretty_num(end)}", inline=True)
         embed.add_field(name="Level Range", value=f"{lvl_start} → {lvl_end}", inline=True)
         embed.add_field(name="XP Gained", value=f"{pretty_num(gained)}", inline=False)
-        embed.add_field(name="Rate", value=f"{self.pkr} PKR ({self.usd}) per 100 XP", inline=False)
-        total_line = f"💰 {pretty_num(int(total_pkr))} PKR"
-        if total_usd is not None:
-            total_line += f" (~${total_usd:.2f})"
+        embed.add_field(name="Rate", value=f"{fmt_pkr(self.pkr)} PKR ({fmt_usd(self.usd)}) per 100 XP", inline=False)
+        if len(quote.lines) > 1:
+            embed.add_field(name="Breakdown", value=format_breakdown(quote), inline=False)
+        total_line = f"💰 {fmt_pkr_total(quote.pkr)} PKR (~{fmt_usd_total(quote.usd)})"
         embed.add_field(name="Total", value=total_line, inline=False)
         embed.set_footer(text=f"Range selected: {self.range_label}")
 
         # Add Create Ticket button below the summary
-        view = ConfirmEstimateView(self.user, self.skill, self.range_label, start, end, gained, self.pkr, total_pkr, total_usd)
+        view = ConfirmEstimateView(self.user, self.skill, self.catalog, self.range_label, start, end)
         # send ephemeral so only the user sees this summary and can create a ticket
         await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
 
 
 # ---------- Confirm + Create Ticket ----------
-class CreateTicketButton(Button):
-    def __init__(self, user: discord.User, skill, range_label, start, end, gained, rate_pkr, total_pkr, total_usd):
-        super().__init__(label="🎟 Create Leveling Ticket", style=discord.ButtonStyle.primary)
-        self.user = user
+class CreateTicketButton(
+    DynamicItem[Button],
+    template=rf"lv:order:(?P<owner>\d+):(?P<version>\d+):(?P<ref>{ITEM_REF_RE}):(?P<start>\d+):(?P<end>\d+):(?P<skill>[A-Za-z]+)",
+):
+    def __init__(self, owner_id: int, skill: str, version: int, ref: str, start: int, end: int):
+        super().__init__(Button(label="🎟 Create Leveling Ticket", style=discord.ButtonStyle.primary,
+                                custom_id=f"lv:order:{owner_id}:{version}:{ref}:{start}:{end}:{skill}"))
+        self.owner_id = owner_id
         self.skill = skill
-        self.range_label = range_label
+        self.version = version
+        self.ref = ref
         self.start = start
         self.end = end
-        self.gained = gained
-        self.rate_pkr = rate_pkr
-        self.total_pkr = total_pkr
-        self.total_usd = total_usd
 
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls(int(match["owner"]), match["skill"], int(match["version"]), match["ref"],
+                   int(match["start"]), int(match["end"]))
+
+    @instrumented
     async def callback(self, interaction: discord.Interaction):
         # Prevent others from clicking
-        if interaction.user.id != self.user.id:
+        if interaction.user.id != self.owner_id:
             await interaction.response.send_message("This button is only for the user who requested the estimate.", ephemeral=True)
             return
 
-        guild = interaction.guild
+        catalog = catalog_at(self.version)  # None if these prices are no longer in the recent snapshots
+        range_label = catalog.leveling.resolve(self.ref) if catalog else None
+        if range_label is None:
+            await interaction.response.send_message(EXPIRED, ephemeral=True)
+            return
+        rate_pkr, _ = catalog.leveling.price(range_label)
+        quote = engine_for(catalog).quote(range_label, self.start, self.end)
+        lvl_start, lvl_end = xp_to_level(self.start), xp_to_level(self.end)
         author = interaction.user
 
-        # create unique ticket channel name
-        base = f"{TICKET_PREFIX}-{author.name.lower()}"
-        ticket_name = base
-        i = 1
-        while discord.utils.get(guild.text_channels, name=ticket_name):
-            ticket_name = f"{base}-{i}"
-            i += 1
-
-        # build overwrites
-        overwrites = {
-            guild.default_role: discord.PermissionOverwrite(view_channel=False),
-            author: discord.PermissionOverwrite(view_channel=True, send_messages=True, read_messages=True),
-        }
-        # allow staff roles
-        for role_id in (ROLE_OWNER, ROLE_MODERATOR, ROLE_STAFF):
-            role = guild.get_role(role_id)
-            if role:
-                overwrites[role] = discord.PermissionOverwrite(view_channel=True, send_messages=True, read_messages=True)
-
-        category = guild.get_channel(CATEGORY_TICKET_ID) if CATEGORY_TICKET_ID else None
-        # create channel
-        ticket = await guild.create_text_channel(name=ticket_name, overwrites=overwrites, category=category)
-
         # build order embed to post in ticket
         embed = discord.Embed(title="🎟 New Leveling Order", color=discord.Color.gold())
         embed.add_field(name="Customer", value=author.mention, inline=True)
         embed.add_field(name="Skill", value=self.skill, inline=True)
-        embed.add_field(name="Range Selected", value=self.range_label, inline=False)
+        embed.add_field(name="Range Selected", value=range_label, inline=False)
         embed.add_field(name="XP Range", value=f"{pretty_num(self.start)} → {pretty_num(self.end)}", inline=True)
-        embed.add_field(name="Level Range", value=f"{xp_to_level(self.start)} → {xp_to_level(self.end)}", inline=True)
-        embed.add_field(name="XP Gained", value=f"{pretty_num(self.gained)}", inline=False)
-        embed.add_field(name="Rate", value=f"{self.rate_pkr} PKR per 100 XP", inline=False)
-        total_line = f"💰 {pretty_num(int(self.total_pkr))} PKR"
-        if self.total_usd is not None:
-            total_line += f" (~${self.total_usd:.2f})"
+        embed.add_field(name="Level Range", value=f"{lvl_start} → {lvl_end}", inline=True)
+        embed.add_field(name="XP Gained", value=f"{pretty_num(self.end - self.start)}", inline=False)
+        embed.add_field(name="Rate", value=f"{fmt_pkr(rate_pkr)} PKR per 100 XP", inline=False)
+        if len(quote.lines) > 1:
+            embed.add_field(name="Breakdown", value=format_breakdown(quote), inline=False)
+        total_line = f"💰 {fmt_pkr_total(quote.pkr)} PKR (~{fmt_usd_total(quote.usd)})"
         embed.add_field(name="Total", value=total_line, inline=False)
-        embed.set_footer(text="Staff: use the buttons below to manage this ticket.")
-
-        # Attach the same TicketControlView from main.py (import inside to avoid circular import)
-        try:
-            from main import TicketControlView
-            view = TicketControlView(author)
-        except Exception:
-            view = None
-
-        await ticket.send(content=f"{author.mention} — your leveling ticket has been created. Staff will assist you shortly.", embed=embed, view=view)
-        await interaction.response.send_message(f"✅ Ticket created: {ticket.mention}", ephemeral=True)
+        embed.set_footer(text=f"Staff: use the buttons below to manage this ticket. • Prices v{quote.version}")
+
+        # ack first; the create call (overwrites + category + topic) and the message run on the worker pool
+        job = lambda: open_ticket(
+            interaction.guild,
+            author,
+            topic=f"Leveling order for {author.name}: {self.skill} {lvl_start}-{lvl_end}",
+            embed=embed,
+            view=TicketControlView(author),
+            content=f"{author.mention} — your leveling ticket has been created. Staff will assist you shortly.",
+            order=Order("leveling", author.id, None, (range_label,), self.end - self.start,
+                        quote.pkr, quote.usd, catalog.version),
+        )
+        await defer_then_run(interaction, job, lambda ticket: f"✅ Ticket created: {ticket.mention}")
 
 
 class ConfirmEstimateView(View):
-    def __init__(self, user: discord.User, skill, range_label, start, end, gained, rate_pkr, total_pkr, total_usd):
+    def __init__(self, user: discord.User, skill: str, catalog, range_label: str, start: int, end: int):
         super().__init__(timeout=None)
-        self.add_item(CreateTicketButton(user, skill, range_label, start, end, gained, rate_pkr, total_pkr, total_usd))
+        self.add_item(CreateTicketButton(user.id, skill, catalog.version, catalog.leveling.ref(range_label), start, end))
         # keep only Closeable by user (we don't add other buttons here)
 
 
+DYNAMIC_ITEMS = (SkillSelect, RangeSelect, CreateTicketButton)
+
+
+# ---------- Panel entry ----------
+@ROUTER.panel("btn_leveling", "⚔️ Leveling", "Order leveling services", position=2)
+async def open_leveling(interaction: discord.Interaction):
+    embed = discord.Embed(
+        title="⚔️ Leveling Services",
+        description="Select a skill to view available methods:",
+        color=discord.Color.dark_teal(),
+    )
+    await interaction.response.send_message(embed=embed, view=LevelingStartView(interaction.user), ephemeral=True)
+
 # End of file
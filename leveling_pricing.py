@@ -0,0 +1,153 @@
+# leveling_pricing.py
+import re
+from bisect import bisect_right
+from collections import namedtuple
+
+from xp_table import MAX_LEVEL, XP_TABLE
+
+# "Woodcutting 15-35", "Runecrafting 1-23 (Lava/ZMI)", "Rock/Sand Crabs (1-70 All)"
+RANGE_RE = re.compile(r"\b(\d{1,2})\s*-\s*(\d{1,2})\b")
+
+Bracket = namedtuple("Bracket", "key line lo_level hi_level pkr usd")
+QuoteLine = namedtuple("QuoteLine", "label start_xp end_xp rate_pkr rate_usd pkr usd")
+Quote = namedtuple("Quote", "pkr usd lines version")  # amounts in catalog minor units
+
+OUTSIDE_LABEL = "Outside listed brackets"
+
+
+# ---------- Key parsing ----------
+def parse_bracket(key: str, pkr, usd) -> Bracket:
+    """
+    Split a rate key into its method line and level range.
+    'Runecrafting 1-23 (Lava/ZMI)' -> line 'Runecrafting (Lava/ZMI)', levels 1..23.
+    Keys without a range (e.g. 'Monkey Madness 1 - Bursting') cover 1..99 on their own line.
+    """
+    m = RANGE_RE.search(key)
+    if not m:
+        return Bracket(key, key, 1, MAX_LEVEL, pkr, usd)
+    lo, hi = int(m.group(1)), int(m.group(2))
+    line = key[:m.start()] + key[m.end():]
+    line = re.sub(r"\s+", " ", line).replace("( ", "(").replace(" )", ")").replace("()", "").strip()
+    return Bracket(key, line, min(lo, hi), min(max(lo, hi), MAX_LEVEL), pkr, usd)
+
+
+# ---------- Cost tables ----------
+class RateLine:
+    """
+    Cumulative cost table for one method line (all brackets of e.g. 'Woodcutting').
+    Segments are indexed by starting XP; XP not covered by any bracket is tracked
+    separately so it can be billed at the rate the customer picked.
+    Rates are minor units per 100 XP; running costs are kept ×100 so they stay exact ints.
+    """
+
+    __slots__ = ("name", "starts", "rates", "keys", "cost_pkr", "cost_usd", "uncovered")
+
+    def __init__(self, name: str, brackets):
+        self.name = name
+        self.starts = []    # segment start XP
+        self.rates = []     # (pkr, usd) per 100 XP, None for gaps
+        self.keys = []      # bracket key per segment, None for gaps
+        self.cost_pkr = []  # covered PKR cost (×100) from 0 XP up to starts[i]
+        self.cost_usd = []
+        self.uncovered = [] # uncovered XP from 0 up to starts[i]
+
+        pos = 0
+        for b in sorted(brackets, key=lambda b: (b.lo_level, b.hi_level)):
+            lo, hi = XP_TABLE[b.lo_level], XP_TABLE[b.hi_level]
+            lo = max(lo, pos)  # overlapping brackets: the earlier one keeps its levels
+            if hi <= lo:
+                continue
+            if lo > pos:
+                self._add(pos, None, None)
+            self._add(lo, (b.pkr, b.usd), b.key)
+            pos = hi
+        # the 99 bracket keeps going up to 200m XP; anything else past the last bracket is a gap
+        if not self.keys or pos < XP_TABLE[MAX_LEVEL]:
+            self._add(pos, None, None)
+
+    def _add(self, start, rate, key):
+        if self.starts:
+            i = len(self.starts) - 1
+            span = start - self.starts[i]
+            prev = self.rates[i]
+            self.cost_pkr.append(self.cost_pkr[i] + (span * prev[0] if prev else 0))
+            self.cost_usd.append(self.cost_usd[i] + (span * prev[1] if prev else 0))
+            self.uncovered.append(self.uncovered[i] + (0 if prev else span))
+        else:
+            self.cost_pkr.append(0)
+            self.cost_usd.append(0)
+            self.uncovered.append(0)
+        self.starts.append(start)
+        self.rates.append(rate)
+        self.keys.append(key)
+
+    def _at(self, xp):
+        """(pkr×100, usd×100, uncovered_xp) accumulated from 0 XP up to `xp`, O(log n)."""
+        i = bisect_right(self.starts, xp) - 1
+        if i < 0:
+            return 0, 0, 0
+        span = xp - self.starts[i]
+        rate = self.rates[i]
+        if rate is None:
+            return self.cost_pkr[i], self.cost_usd[i], self.uncovered[i] + span
+        return self.cost_pkr[i] + span * rate[0], self.cost_usd[i] + span * rate[1], self.uncovered[i]
+
+    def total(self, start_xp, end_xp, fallback):
+        """Total (pkr, usd) minor units for start_xp -> end_xp; gaps are billed at `fallback`."""
+        p0, u0, g0 = self._at(start_xp)
+        p1, u1, g1 = self._at(end_xp)
+        gap = g1 - g0
+        return _per_100(p1 - p0 + gap * fallback[0]), _per_100(u1 - u0 + gap * fallback[1])
+
+    def breakdown(self, start_xp, end_xp, fallback):
+        """Itemised QuoteLines for start_xp -> end_xp, O(log n + k)."""
+        lines = []
+        i = max(bisect_right(self.starts, start_xp) - 1, 0)
+        while i < len(self.starts) and self.starts[i] < end_xp:
+            seg_start = max(self.starts[i], start_xp)
+            seg_end = end_xp if i + 1 == len(self.starts) else min(self.starts[i + 1], end_xp)
+            rate = self.rates[i] or fallback
+            xp = seg_end - seg_start
+            if xp > 0:
+                lines.append(QuoteLine(self.keys[i] or OUTSIDE_LABEL, seg_start, seg_end,
+                                       rate[0], rate[1], _per_100(xp * rate[0]), _per_100(xp * rate[1])))
+            i += 1
+        return lines
+
+
+def _per_100(amount: int) -> int:
+    """Round an amount ×100 back to whole minor units (half up)."""
+    return (amount + 50) // 100
+
+
+class LevelingPricing:
+    """Parses the leveling catalog keys once and answers From/To quotes across brackets."""
+
+    def __init__(self, section, version: int = 1):
+        self.version = version
+        self.brackets = {}
+        grouped = {}
+        for key, pkr, usd in section.items():
+            b = parse_bracket(key, pkr, usd)
+            self.brackets[key] = b
+            grouped.setdefault(b.line, []).append(b)
+        self.lines = {name: RateLine(name, items) for name, items in grouped.items()}
+
+    def quote(self, key: str, start_xp: int, end_xp: int) -> Quote:
+        """
+        Price start_xp -> end_xp on the method line of bracket `key`.
+        Each bracket the range crosses is billed at its own rate.
+        """
+        b = self.brackets[key]
+        line = self.lines[b.line]
+        fallback = (b.pkr, b.usd)
+        pkr, usd = line.total(start_xp, end_xp, fallback)
+        return Quote(pkr, usd, line.breakdown(start_xp, end_xp, fallback), self.version)
+
+
+def engine_for(catalog) -> LevelingPricing:
+    """Pricing engine for a catalog snapshot, built on first use and cached on it."""
+    engine = catalog.cache.get("leveling_engine")
+    if engine is None:
+        engine = catalog.cache["leveling_engine"] = LevelingPricing(catalog.leveling, catalog.version)
+    return engine
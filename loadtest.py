@@ -0,0 +1,385 @@
+# loadtest.py
+"""
+Load-test harness: replays synthetic order traffic against the real panel
+classes with a fake Discord (interactions, guild, channels) and a REST stand-in
+that enforces Discord-like rate-limit buckets. No network, no bot token.
+
+Run: python loadtest.py --rate 5 --duration 60 --mix quest=1,leveling=1,bossing=1,minigames=1
+"""
+import argparse
+import asyncio
+import itertools
+import random
+import statistics
+import time
+
+import discord
+
+import bossing_panel  # noqa: F401 (registers btn_bossing with ROUTER)
+import leveling_panel
+import minigames_panel  # noqa: F401 (registers btn_minigames with ROUTER)
+import quest_panel
+from catalog import current_catalog
+from dispatch import ROUTER
+from instrumentation import handler_stats
+from jobs import TICKET_JOBS
+from order_ledger import ORDER_LEDGER
+from ticket_store import TICKET_STORE
+
+ACK_DEADLINE = 3.0
+
+# route -> (requests, per seconds) per major parameter; Discord doesn't publish
+# all of these, they're conservative figures observed on real guilds
+ROUTE_LIMITS = {
+    "POST /guilds/{guild_id}/channels": (5, 5.0),
+    "POST /channels/{channel_id}/messages": (5, 5.0),
+    "POST /webhooks/{application_id}/{interaction_token}": (5, 2.0),
+}
+GLOBAL_LIMIT = (50, 1.0)
+
+_ids = itertools.count(1 << 50)
+
+
+# ---------- REST stand-in ----------
+class Bucket:
+    """Fixed-window rate limit: `limit` requests per `per` seconds."""
+
+    def __init__(self, limit: int, per: float):
+        self.limit = limit
+        self.per = per
+        self.remaining = limit
+        self.reset_at = 0.0
+
+    def take(self, now: float):
+        """None if the request may go out, else seconds until the bucket resets (a 429)."""
+        if now >= self.reset_at:
+            self.remaining = self.limit
+            self.reset_at = now + self.per
+        if self.remaining == 0:
+            return self.reset_at - now
+        self.remaining -= 1
+        return None
+
+
+class FakeREST:
+    """
+    Every request costs `latency` seconds (+/- jitter). A request over its
+    route bucket or the global limit gets a 429 and is retried after the reset,
+    the way discord.py waits them out.
+    """
+
+    def __init__(self, latency: float = 0.08, jitter: float = 0.3):
+        self.latency = latency
+        self.jitter = jitter
+        self.buckets = {}
+        self.global_bucket = Bucket(*GLOBAL_LIMIT)
+        self.calls = {}
+        self.rate_limited = {}
+
+    def _bucket(self, route: str, major):
+        limits = ROUTE_LIMITS.get(route)
+        if limits is None:
+            return None
+        bucket = self.buckets.get((route, major))
+        if bucket is None:
+            bucket = self.buckets[(route, major)] = Bucket(*limits)
+        return bucket
+
+    async def request(self, route: str, major=None):
+        self.calls[route] = self.calls.get(route, 0) + 1
+        bucket = self._bucket(route, major)
+        while True:
+            await asyncio.sleep(self.latency * random.uniform(1 - self.jitter, 1 + self.jitter))
+            now = time.monotonic()
+            retry_after = self.global_bucket.take(now)
+            if retry_after is None and bucket is not None:
+                retry_after = bucket.take(now)
+            if retry_after is None:
+                return
+            self.rate_limited[route] = self.rate_limited.get(route, 0) + 1
+            await asyncio.sleep(retry_after)
+
+
+# ---------- Fake Discord ----------
+class FakeRole:
+    def __init__(self, role_id: int):
+        self.id = role_id
+
+
+class FakeMember:
+    bot = False
+
+    def __init__(self, n: int):
+        self.id = next(_ids)
+        self.name = f"loadtest{n}"
+        self.mention = f"<@{self.id}>"
+        self.roles = []
+
+
+class FakeTextChannel:
+    def __init__(self, rest: FakeREST, guild, name: str):
+        self.id = next(_ids)
+        self.rest = rest
+        self.guild = guild
+        self.name = name
+        self.mention = f"<#{self.id}>"
+
+    async def send(self, content=None, **kwargs):
+        await self.rest.request("POST /channels/{channel_id}/messages", self.id)
+
+
+class FakeGuild:
+    def __init__(self, rest: FakeREST):
+        self.id = next(_ids)
+        self.rest = rest
+        self.default_role = FakeRole(self.id)
+        self.categories = []
+        self.text_channels = []
+
+    def get_role(self, role_id):
+        return None
+
+    def get_channel(self, channel_id):
+        return None
+
+    async def create_text_channel(self, name: str, **kwargs):
+        await self.rest.request("POST /guilds/{guild_id}/channels", self.id)
+        channel = FakeTextChannel(self.rest, self, name)
+        self.text_channels.append(channel)
+        return channel
+
+
+class FakeResponse:
+    """InteractionResponse stand-in; keeps the last view/modal sent so the journey can continue."""
+
+    def __init__(self, interaction):
+        self.interaction = interaction
+        self.done = False
+        self.view = None
+        self.modal = None
+
+    def is_done(self) -> bool:
+        return self.done
+
+    async def _respond(self):
+        if self.done:
+            raise discord.InteractionResponded(self.interaction)
+        self.done = True
+        await self.interaction.rest.request("POST /interactions/{interaction_id}/{interaction_token}/callback")
+        self.interaction.first_response = time.monotonic() - self.interaction.started
+
+    async def defer(self, **kwargs):
+        await self._respond()
+
+    async def send_message(self, content=None, *, view=None, **kwargs):
+        self.view = view
+        await self._respond()
+
+    async def edit_message(self, *, view=None, **kwargs):
+        self.view = view
+        await self._respond()
+
+    async def send_modal(self, modal):
+        self.modal = modal
+        await self._respond()
+
+
+class FakeFollowup:
+    def __init__(self, interaction):
+        self.interaction = interaction
+        self.view = None
+
+    async def send(self, content=None, *, view=None, **kwargs):
+        self.view = view
+        await self.interaction.rest.request("POST /webhooks/{application_id}/{interaction_token}",
+                                            self.interaction.id)
+
+
+class FakeInteraction:
+    type = discord.InteractionType.component
+
+    def __init__(self, rest: FakeREST, guild: FakeGuild, user: FakeMember, data=None):
+        self.id = next(_ids)
+        self.rest = rest
+        self.guild = guild
+        self.user = user
+        self.data = data or {}
+        self.created_at = discord.utils.utcnow()
+        self.started = time.monotonic()
+        self.first_response = None
+        self.response = FakeResponse(self)
+        self.followup = FakeFollowup(self)
+
+
+# ---------- Journeys ----------
+def _select(item, values):
+    """Pretend the user picked `values` in a select (plain or DynamicItem-wrapped)."""
+    getattr(item, "item", item)._values = list(values)
+
+
+class Session:
+    """One simulated customer; every step is a fresh interaction, like real clicks."""
+
+    def __init__(self, harness, n: int):
+        self.harness = harness
+        self.user = FakeMember(n)
+
+    async def step(self, callback, data=None):
+        interaction = FakeInteraction(self.harness.rest, self.harness.guild, self.user, data)
+        await callback(interaction)
+        self.harness.first_responses.append(interaction.first_response)
+        if self.harness.think:
+            await asyncio.sleep(random.expovariate(1 / self.harness.think))
+        return interaction.response
+
+    async def panel(self, custom_id: str):
+        return await self.step(ROUTER.dispatch, {"custom_id": custom_id})
+
+    async def quest(self):
+        modal = (await self.panel("btn_questing")).modal
+        modal.rsn._value = self.user.name
+        view = (await self.step(modal.on_submit)).view
+        picks = random.sample(current_catalog().quests.ids[:25], 3)
+        await self.step(view.select_callback, {"values": picks})
+        confirm = next(c for c in view.children if isinstance(c, quest_panel.ConfirmOrderButton))
+        await self.step(confirm.callback)
+
+    async def leveling(self):
+        view = (await self.panel("btn_leveling")).view
+        skill_select = view.children[0]
+        _select(skill_select, [random.choice(leveling_panel.CORE_SKILLS[:6])])
+        range_select = (await self.step(skill_select.callback)).view.children[0]
+        _select(range_select, [range_select.item.options[0].value])
+        modal = (await self.step(range_select.callback)).modal
+        modal.from_xp._value = "lvl 50"
+        modal.to_xp._value = "lvl 70"
+        confirm = (await self.step(modal.on_submit)).view.children[0]
+        await self.step(confirm.callback)
+
+    async def bossing(self):
+        view = (await self.panel("btn_bossing")).view
+        category_select = view.children[0]
+        _select(category_select, [random.choice(category_select.item.options).value])
+        boss_select = (await self.step(category_select.callback)).view.children[0]
+        _select(boss_select, [random.choice(boss_select.item.options).value])
+        response = await self.step(boss_select.callback)
+        if response.modal is None:  # quote-only service: the order button comes as a followup
+            confirm = response.interaction.followup.view.children[0]
+        else:
+            response.modal.qty._value = "5"
+            confirm = (await self.step(response.modal.on_submit)).view.children[0]
+        await self.step(confirm.callback)
+
+    async def minigames(self):
+        view = (await self.panel("btn_minigames")).view
+        game_select = view.children[0]
+        _select(game_select, [random.choice(game_select.item.options).value])
+        method_select = (await self.step(game_select.callback)).view.children[0]
+        _select(method_select, [random.choice(method_select.item.options).value])
+        modal = (await self.step(method_select.callback)).modal
+        modal.quantity._value = "500"
+        confirm = (await self.step(modal.on_submit)).view.children[0]
+        await self.step(confirm.callback)
+
+
+JOURNEYS = ("quest", "leveling", "bossing", "minigames")
+
+
+class Harness:
+    def __init__(self, rest: FakeREST, think: float = 0.0):
+        self.rest = rest
+        self.guild = FakeGuild(rest)
+        self.think = think
+        self.first_responses = []
+        self.orders = []  # end-to-end seconds per completed order
+        self.failures = 0
+
+    async def order(self, kind: str, n: int):
+        started = time.monotonic()
+        try:
+            await getattr(Session(self, n), kind)()
+        except Exception as e:
+            self.failures += 1
+            print(f"order {n} ({kind}) failed: {e!r}")
+        else:
+            self.orders.append(time.monotonic() - started)
+
+    async def run(self, rate: float, duration: float, mix: dict):
+        """Poisson arrivals at `rate` orders/s for `duration` s; waits for stragglers."""
+        kinds, weights = zip(*mix.items())
+        tasks = []
+        started = time.monotonic()
+        n = 0
+        while time.monotonic() - started < duration:
+            tasks.append(asyncio.create_task(self.order(random.choices(kinds, weights)[0], n)))
+            n += 1
+            await asyncio.sleep(random.expovariate(rate))
+        await asyncio.gather(*tasks)
+        return n, time.monotonic() - started
+
+
+# ---------- Report ----------
+def percentiles(samples, scale=1.0, unit=""):
+    if not samples:
+        return "no samples"
+    cuts = statistics.quantiles(samples, n=100, method="inclusive") if len(samples) > 1 else samples * 99
+    return "   ".join(f"{name} {value * scale:.0f}{unit}"
+                       for name, value in (("p50", cuts[49]), ("p95", cuts[94]), ("p99", cuts[98]),
+                                           ("max", max(samples))))
+
+
+def report(harness: Harness, offered: int, elapsed: float, args):
+    done = len(harness.orders)
+    rest = harness.rest
+    print(f"\n{offered} orders offered at {args.rate}/s over {args.duration:.0f} s "
+          f"({', '.join(f'{k} {w}' for k, w in args.mix.items())}), {TICKET_JOBS.workers} ticket workers, "
+          f"REST latency {args.rest_latency * 1000:.0f} ms")
+    print(f"completed {done} ({done / elapsed:.2f} orders/s), failed {harness.failures}, wall {elapsed:.1f} s")
+    print(f"first response    {percentiles(harness.first_responses, 1000, ' ms')}   "
+          f"missed {ACK_DEADLINE:.0f} s ack: {sum(t > ACK_DEADLINE for t in harness.first_responses)}")
+    print(f"order end-to-end  {percentiles(harness.orders, 1000, ' ms')}")
+
+    total = sum(rest.calls.values())
+    print(f"REST calls per order: {total / max(done, 1):.2f}")
+    for route, n in sorted(rest.calls.items(), key=lambda kv: -kv[1]):
+        print(f"  {n / max(done, 1):5.2f}  {route}")
+    limited = sum(rest.rate_limited.values())
+    print(f"429s: {limited}" + "".join(f"\n  {n:5d}  {r}" for r, n in sorted(rest.rate_limited.items())))
+
+    print(f"{'handler latency (ms)':42s} calls     p50     p95     p99")
+    for handler, calls, p50, p95, p99, *_ in handler_stats():
+        print(f"  {handler[:40]:40s} {calls:6d} {p50 * 1000:7.0f} {p95 * 1000:7.0f} {p99 * 1000:7.0f}")
+
+
+def parse_mix(value: str) -> dict:
+    mix = {}
+    for part in value.split(","):
+        kind, _, weight = part.partition("=")
+        if kind not in JOURNEYS:
+            raise argparse.ArgumentTypeError(f"unknown journey {kind!r} ({', '.join(JOURNEYS)})")
+        mix[kind] = float(weight or 1)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay synthetic order traffic against the panels.")
+    parser.add_argument("--rate", type=float, default=2.0, help="new orders per second")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of arrivals")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("quest=1,leveling=1,bossing=1,minigames=1"),
+                        help="journey weights, e.g. quest=3,leveling=1,bossing=1,minigames=1")
+    parser.add_argument("--workers", type=int, default=TICKET_JOBS.workers, help="ticket worker pool size")
+    parser.add_argument("--rest-latency", type=float, default=0.08, help="seconds per REST call")
+    parser.add_argument("--think", type=float, default=0.0, help="mean user think time between clicks")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    TICKET_JOBS.workers = args.workers
+    ORDER_LEDGER.path = TICKET_STORE.path = ":memory:"  # synthetic orders must not land in bot.db
+    harness = Harness(FakeREST(args.rest_latency), args.think)
+    offered, elapsed = asyncio.run(harness.run(args.rate, args.duration, args.mix))
+    report(harness, offered, elapsed, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# loop_monitor.py
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+
+from config import LOOP_MONITOR_INTERVAL, SLOW_CALLBACK_SECONDS
+from metrics import Counter, Histogram
+
+log = logging.getLogger(__name__)
+
+LOOP_LAG = Histogram("event_loop_lag_seconds", "How late the loop woke a sleeping probe task",
+                     buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5))
+LOOP_STALLS = Counter("event_loop_stalls_total", "Probe wakeups delayed past the slow-callback threshold")
+
+
+class LoopMonitor:
+    """
+    Measures event loop scheduling lag and catches callbacks that block it.
+
+    A probe task sleeps `interval` and records how late it woke up. A watchdog
+    thread checks the probe's heartbeat; when the loop has been stuck longer than
+    `threshold` it samples the loop thread's stack (and the running task) while
+    the offending code is still on it, and logs that once per stall.
+    """
+
+    def __init__(self, interval: float = LOOP_MONITOR_INTERVAL, threshold: float = SLOW_CALLBACK_SECONDS):
+        self.interval = interval
+        self.threshold = threshold
+        self._loop = None
+        self._loop_thread = None
+        self._beat = 0.0
+        self._reported = None
+        self._task = None
+        self._stop = threading.Event()
+
+    def start(self):
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._probe(), name="loop-monitor")
+        threading.Thread(target=self._watch, name="loop-watchdog", daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _probe(self):
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.interval)
+            self._beat = time.monotonic()
+            lag = max(0.0, self._beat - started - self.interval)
+            LOOP_LAG.observe(lag)
+            if lag > self.threshold:
+                LOOP_STALLS.inc()
+                log.warning("Event loop was blocked for %.0f ms", lag * 1000)
+
+    # ---------- Watchdog (own thread) ----------
+    def _watch(self):
+        while not self._stop.wait(self.threshold / 2):
+            beat = self._beat
+            stalled = time.monotonic() - beat - self.interval
+            if stalled > self.threshold and self._reported != beat:
+                self._reported = beat
+                log.warning("Event loop blocked for %.0f ms so far in %s:\n%s",
+                            stalled * 1000, self._running_task(), self.sample_stack())
+
+    def _running_task(self) -> str:
+        try:
+            task = asyncio.current_task(self._loop)
+        except RuntimeError:
+            task = None
+        return f"task {task.get_name()!r} ({task.get_coro().__qualname__})" if task else "a plain callback"
+
+    def sample_stack(self) -> str:
+        """Current stack of the event loop thread."""
+        frame = sys._current_frames().get(self._loop_thread)
+        return "".join(traceback.format_stack(frame)) if frame else "(no frame)"
+
+
+LOOP_MONITOR = LoopMonitor()
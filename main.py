@@ -3,231 +3,227 @@ import discord
 from discord import app_commands
 from discord.ext import commands
 import asyncio
-import io
-from flask import Flask
-from threading import Thread
-
-# ---------------- Keep Alive ----------------
-app = Flask('')
-
-@app.route('/')
-def home():
-    return "I'm alive!"
-
-def run():
-    app.run(host='0.0.0.0', port=8080)
-
-def keep_alive():
-    t = Thread(target=run)
-    t.start()
 
 # ---------------- Config ----------------
 from config import (
     BOT_TOKEN,
     GUILD_ID,
-    CATEGORY_TICKET_ID,
-    ROLE_OWNER,
-    ROLE_MODERATOR,
-    ROLE_STAFF,
-    TICKET_PREFIX,
+    HEALTH_HOST,
+    HEALTH_PORT,
 )
 
-# Panels
-from quest_panel import RSNModal
-from leveling_panel import LevelingStartView
-from minigames_panel import MinigamesStartView
-from bossing_panel import BossingStartView
+# Panels and ticket controls (each registers its routes with ROUTER on import)
+import quest_panel
+import leveling_panel
+import minigames_panel
+import bossing_panel
+import ticket_controls
+from catalog import reload_catalog, watch_price_file
+from ticket_registry import TICKETS
+from ticket_store import TICKET_STORE
+from ticket_reaper import TICKET_REAPER
+from category_pool import CATEGORY_POOL
+from ticket_service import forget_guild, is_staff
+from message_log import MESSAGE_LOG
+from transcript_index import SearchResultsView
+from dispatch import ROUTER, PanelView
+from health import HealthServer
+from loop_monitor import LOOP_LAG, LOOP_MONITOR
+from instrumentation import install as install_instrumentation, instrumented, handler_stats, RATE_LIMITED
 
 
-# ---------- Utils ----------
-def is_staff(member: discord.Member):
-    return any(r.id in {ROLE_OWNER, ROLE_MODERATOR, ROLE_STAFF} for r in member.roles)
+# ---------- Bot Setup ----------
+intents = discord.Intents.default()
+intents.guilds = True
+intents.messages = True
+intents.members = True
+bot = commands.Bot(command_prefix="!", intents=intents)
+health = HealthServer(bot)
+price_watcher = None
 
 
-# ---------- Ticket Controls ----------
-class CloseTicketButton(discord.ui.Button):
-    def __init__(self, owner: discord.Member):
-        super().__init__(style=discord.ButtonStyle.secondary, label="🔒 Close Ticket")
-        self.owner = owner
+@bot.event
+async def setup_hook():
+    # stateless components: routed by custom_id, nothing stored per message, survive restarts
+    bot.add_dynamic_items(
+        *leveling_panel.DYNAMIC_ITEMS,
+        *bossing_panel.DYNAMIC_ITEMS,
+        *minigames_panel.DYNAMIC_ITEMS,
+    )
+    health.components_registered = True
+    install_instrumentation(bot)  # per-handler latency, REST calls per route, 429s
+    LOOP_MONITOR.start()  # loop lag metrics, stack samples of blocking callbacks
+    await health.start(HEALTH_HOST, HEALTH_PORT)  # /healthz, /readyz, /metrics on this loop
 
-    async def callback(self, interaction: discord.Interaction):
-        if interaction.user.id != self.owner.id and not is_staff(interaction.user):
-            await interaction.response.send_message(
-                "You don't have permission to close this ticket.", ephemeral=True
-            )
-            return
 
-        view = ConfirmCloseView(self.owner)
-        await interaction.response.send_message(
-            "Are you sure you want to close this ticket?", view=view, ephemeral=True
-        )
+@bot.event
+async def on_ready():
+    global price_watcher
+    print(f"✅ Logged in as {bot.user}")
+    if price_watcher is None:  # on_ready fires again on reconnects
+        price_watcher = asyncio.create_task(watch_price_file())
+    MESSAGE_LOG.on_connect()
+    if not TICKET_STORE.records:
+        TICKET_STORE.load()  # owners, state and name counters survive restarts
+    owners = TICKET_STORE.owners()
+    for guild in bot.guilds:
+        TICKETS.rebuild(guild, owners, TICKET_STORE.counters)
+        TICKET_STORE.reconcile(guild, TICKETS)
+        TICKET_REAPER.seed(guild, TICKETS)
+        CATEGORY_POOL.seed(guild)
+    TICKET_REAPER.start(bot)
+    try:
+        synced = await bot.tree.sync(guild=discord.Object(id=GUILD_ID)) if GUILD_ID else await bot.tree.sync()
+        print(f"Synced {len(synced)} commands.")
+        health.commands_synced = True
+    except Exception as e:
+        print(f"Failed to sync: {e}")
 
 
-class ConfirmCloseView(discord.ui.View):
-    def __init__(self, owner: discord.Member):
-        super().__init__(timeout=30)
-        self.owner = owner
+# ---------- /ticket-search command ----------
+@bot.tree.command(name="ticket-search", description="Search archived ticket transcripts (staff only)")
+@app_commands.describe(query="RSN, quest, boss or any words from the ticket", customer="Only this customer's tickets")
+@instrumented
+async def ticket_search(interaction: discord.Interaction, query: str, customer: discord.Member = None):
+    if not is_staff(interaction.user):
+        await interaction.response.send_message("Only staff can search tickets.", ephemeral=True)
+        return
 
-    @discord.ui.button(label="✅ Yes", style=discord.ButtonStyle.success)
-    async def confirm_yes(self, interaction: discord.Interaction, button: discord.ui.Button):
-        await interaction.channel.set_permissions(self.owner, send_messages=False, view_channel=False)
-        await interaction.channel.edit(name=f"closed-{self.owner.name.lower()}")
+    view = SearchResultsView(interaction.user, query, customer.id if customer else None)
+    await interaction.response.send_message(embed=view.render(), view=view, ephemeral=True)
 
-        await interaction.response.send_message(
-            "✅ Ticket has been closed. Only staff can view it now.", ephemeral=True
-        )
 
-        staff_view = StaffAfterCloseView(self.owner)
-        embed = discord.Embed(
-            title="🎟 Ticket Closed",
-            description=f"Ticket closed by {interaction.user.mention}\nStaff options below:",
-            color=discord.Color.dark_grey(),
-        )
-        await interaction.channel.send(embed=embed, view=staff_view)
-
-    @discord.ui.button(label="❌ No", style=discord.ButtonStyle.danger)
-    async def confirm_no(self, interaction: discord.Interaction, button: discord.ui.Button):
-        await interaction.response.send_message("Ticket close cancelled.", ephemeral=True)
-
-
-class StaffAfterCloseView(discord.ui.View):
-    def __init__(self, owner: discord.Member):
-        super().__init__(timeout=None)
-        self.owner = owner
-
-    @discord.ui.button(label="🔓 Reopen Ticket", style=discord.ButtonStyle.primary)
-    async def reopen_ticket(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if not is_staff(interaction.user):
-            await interaction.response.send_message("Only staff can reopen tickets.", ephemeral=True)
-            return
-
-        await interaction.channel.set_permissions(self.owner, view_channel=True, send_messages=True)
-        await interaction.channel.edit(name=f"{TICKET_PREFIX}-{self.owner.name.lower()}")
-        await interaction.response.send_message("🔓 Ticket reopened.", ephemeral=True)
-
-    @discord.ui.button(label="🧾 Transcript", style=discord.ButtonStyle.secondary)
-    async def transcript_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if not is_staff(interaction.user):
-            await interaction.response.send_message("Only staff can generate transcripts.", ephemeral=True)
-            return
-
-        messages = [f"--- Transcript for {interaction.channel.name} ---\n"]
-        async for msg in interaction.channel.history(limit=None, oldest_first=True):
-            messages.append(
-                f"[{msg.created_at.strftime('%Y-%m-%d %H:%M:%S')}] {msg.author}: {msg.content}"
-            )
-        transcript_text = "\n".join(messages)
-
-        file = discord.File(
-            fp=io.BytesIO(transcript_text.encode()),
-            filename=f"{interaction.channel.name}_transcript.txt",
-        )
-        await interaction.user.send(file=file)
-        await interaction.response.send_message("🧾 Transcript sent to your DMs.", ephemeral=True)
+# ---------- Ticket index ----------
+@bot.event
+async def on_guild_channel_create(channel):
+    if isinstance(channel, discord.CategoryChannel):
+        forget_guild(channel.guild.id)
+    CATEGORY_POOL.channel_created(channel)
+    TICKETS.add(channel)
+    if TICKETS.is_ticket(channel.id):
+        MESSAGE_LOG.start_channel(channel.id)
+        TICKET_REAPER.touch(channel.id)
 
-    @discord.ui.button(label="❌ Delete Ticket", style=discord.ButtonStyle.danger)
-    async def delete_ticket(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if not is_staff(interaction.user):
-            await interaction.response.send_message("Only staff can delete tickets.", ephemeral=True)
-            return
 
-        await interaction.response.send_message("Deleting ticket in 3 seconds...", ephemeral=True)
-        await asyncio.sleep(3)
-        await interaction.channel.delete(reason=f"Deleted by {interaction.user}")
+@bot.event
+async def on_guild_channel_delete(channel):
+    if isinstance(channel, discord.CategoryChannel):
+        forget_guild(channel.guild.id)
+    CATEGORY_POOL.channel_deleted(channel)
+    TICKETS.remove(channel)
+    TICKET_STORE.forget(channel.id)
+    TICKET_REAPER.forget(channel.id)
 
 
-class TicketControlView(discord.ui.View):
-    def __init__(self, owner: discord.Member):
-        super().__init__(timeout=None)
-        self.add_item(CloseTicketButton(owner))
+@bot.event
+async def on_guild_channel_update(before, after):
+    TICKETS.rename(before, after)
+    CATEGORY_POOL.channel_moved(before, after)
 
 
-# ---------- Panel ----------
-class PanelView(discord.ui.View):
-    def __init__(self):
-        super().__init__(timeout=None)
-        self.add_item(discord.ui.Button(label="💀 Bossing", style=discord.ButtonStyle.primary, custom_id="btn_bossing"))
-        self.add_item(discord.ui.Button(label="🧙 Questing", style=discord.ButtonStyle.primary, custom_id="btn_questing"))
-        self.add_item(discord.ui.Button(label="⚔️ Leveling", style=discord.ButtonStyle.primary, custom_id="btn_leveling"))
-        self.add_item(discord.ui.Button(label="🎮 Minigames", style=discord.ButtonStyle.primary, custom_id="btn_minigames"))
+# ---------- Ticket message capture (feeds transcripts) ----------
+@bot.listen("on_message")
+async def capture_message(message: discord.Message):
+    if TICKETS.is_ticket(message.channel.id):
+        MESSAGE_LOG.add(message)
+        TICKET_REAPER.touch(message.channel.id)
 
 
-# ---------- Bot Setup ----------
-intents = discord.Intents.default()
-intents.guilds = True
-intents.messages = True
-intents.members = True
-bot = commands.Bot(command_prefix="!", intents=intents)
+@bot.event
+async def on_raw_message_edit(payload: discord.RawMessageUpdateEvent):
+    if TICKETS.is_ticket(payload.channel_id) and "content" in payload.data:
+        MESSAGE_LOG.edit(payload.message_id, payload.data["content"])
 
 
 @bot.event
-async def on_ready():
-    print(f"✅ Logged in as {bot.user}")
-    try:
-        synced = await bot.tree.sync(guild=discord.Object(id=GUILD_ID)) if GUILD_ID else await bot.tree.sync()
-        print(f"Synced {len(synced)} commands.")
-    except Exception as e:
-        print(f"Failed to sync: {e}")
+async def on_raw_message_delete(payload: discord.RawMessageDeleteEvent):
+    if TICKETS.is_ticket(payload.channel_id):
+        MESSAGE_LOG.delete(payload.message_id)
+
+
+# ticket overwrite templates are cached per guild; rebuild them when roles change
+@bot.event
+async def on_guild_role_create(role):
+    forget_guild(role.guild.id)
+
+
+@bot.event
+async def on_guild_role_delete(role):
+    forget_guild(role.guild.id)
 
 
 # ---------- /panel command ----------
 @bot.tree.command(name="panel", description="Open the OSRS Orders panel")
+@instrumented
 async def panel(interaction: discord.Interaction):
     embed = discord.Embed(
         title="OSRS Orders Panel",
         description="Choose a service:",
         color=discord.Color.dark_teal(),
     )
-    embed.add_field(name="💀 Bossing", value="Order Bossing services", inline=False)
-    embed.add_field(name="🧙 Questing", value="Order quest completion services", inline=False)
-    embed.add_field(name="⚔️ Leveling", value="Order leveling services", inline=False)
-    embed.add_field(name="🎮 Minigames", value="Order minigame runs", inline=False)
+    for entry in ROUTER.panels:
+        embed.add_field(name=entry.label, value=entry.summary, inline=False)
 
     await interaction.response.send_message(embed=embed, view=PanelView())
 
 
-# ---------- Button Interactions ----------
-@bot.event
-async def on_interaction(interaction: discord.Interaction):
-    if not interaction.type == discord.InteractionType.component:
+# ---------- /reprice command ----------
+@bot.tree.command(name="reprice", description="Reload prices from the price file (staff only)")
+@instrumented
+async def reprice(interaction: discord.Interaction):
+    if not is_staff(interaction.user):
+        await interaction.response.send_message("Only staff can reload prices.", ephemeral=True)
+        return
+
+    try:
+        catalog = reload_catalog()
+    except (OSError, ValueError) as e:
+        await interaction.response.send_message(f"❌ Prices not reloaded: {e}", ephemeral=True)
         return
 
-    cid = interaction.data.get("custom_id", "")
+    await interaction.response.send_message(
+        f"💱 Prices reloaded (v{catalog.version}). Open orders keep the prices they were quoted on.",
+        ephemeral=True,
+    )
 
-    # 🧙 Questing
-    if cid == "btn_questing":
-        await interaction.response.send_modal(RSNModal(interaction.user))
 
-    # ⚔️ Leveling
-    elif cid == "btn_leveling":
-        embed = discord.Embed(
-            title="⚔️ Leveling Services",
-            description="Select a skill to view available methods:",
-            color=discord.Color.dark_teal(),
-        )
-        await interaction.response.send_message(embed=embed, view=LevelingStartView(interaction.user), ephemeral=True)
-
-    # 🎮 Minigames
-    elif cid == "btn_minigames":
-        embed = discord.Embed(
-            title="🎮 Minigame Services",
-            description="Select a minigame to begin:",
-            color=discord.Color.dark_gold(),
-        )
-        await interaction.response.send_message(embed=embed, view=MinigamesStartView(interaction.user), ephemeral=True)
-
-    # 💀 Bossing
-    elif cid == "btn_bossing":
-        embed = discord.Embed(
-            title="💀 Bossing Services",
-            description="Select a bossing category to begin (Slayer / Wilderness / Raids / Misc).",
-            color=discord.Color.dark_red(),
+# ---------- /stats command ----------
+def _ms(seconds):
+    return "–" if seconds is None else f"{seconds * 1000:.0f}"
+
+
+@bot.tree.command(name="stats", description="Handler latency and Discord API usage since start (staff only)")
+@instrumented
+async def stats(interaction: discord.Interaction):
+    if not is_staff(interaction.user):
+        await interaction.response.send_message("Only staff can view stats.", ephemeral=True)
+        return
+
+    embed = discord.Embed(title="Bot stats", description="Latency in ms: p50 / p95 / p99 (first response p95)",
+                          color=discord.Color.dark_teal())
+    for handler, calls, p50, p95, p99, first_p95, rest, errors in handler_stats()[:20]:
+        embed.add_field(
+            name=handler,
+            value=f"{calls} calls, {_ms(p50)} / {_ms(p95)} / {_ms(p99)} ({_ms(first_p95)})\n"
+                  f"{rest} REST calls, {errors} errors",
+            inline=False,
         )
-        await interaction.response.send_message(embed=embed, view=BossingStartView(interaction.user), ephemeral=True)
+    limited = ", ".join(f"{scope} {n}" for (scope,), n in sorted(RATE_LIMITED.values.items())) or "none"
+    lag = " / ".join(_ms(LOOP_LAG.quantile(q)) for q in (0.5, 0.95, 0.99))
+    embed.set_footer(text=f"429s retried: {limited} · loop lag {lag} ms · full series at /metrics")
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+
+# ---------- Component routing ----------
+# DynamicItems and views are dispatched by discord.py; everything else
+# (panel buttons, ...) goes through the route table the panels register in.
+@bot.event
+async def on_interaction(interaction: discord.Interaction):
+    if interaction.type == discord.InteractionType.component:
+        await ROUTER.dispatch(interaction)
 
 # ---------- Run Bot ----------
 if __name__ == "__main__":
-    keep_alive()  # ✅ keeps your bot 24/7 alive with UptimeRobot
-    bot.run("MTQyMzc4Mzc1MTAxMTQwNTg2NQ.G6TwNj.8tjvH-mBWCA8NV3UAHJxHON7mDUC_Tv3vjKEy8")
+    bot.run(BOT_TOKEN)
 
 
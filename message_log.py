@@ -0,0 +1,151 @@
+# message_log.py
+import discord
+
+from config import DB_PATH
+from history_fetch import PAGE_SIZE, fetch_range
+from ticket_registry import TICKETS
+from storage import connect
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id          INTEGER PRIMARY KEY,  -- message snowflake
+    channel_id  INTEGER NOT NULL,
+    author      TEXT NOT NULL,
+    content     TEXT NOT NULL,
+    created_at  TEXT NOT NULL,
+    edited      INTEGER NOT NULL DEFAULT 0,
+    deleted     INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS messages_by_channel ON messages (channel_id, id);
+
+-- every message up to synced_through is known to be in `messages`
+CREATE TABLE IF NOT EXISTS capture_state (
+    channel_id      INTEGER PRIMARY KEY,
+    synced_through  INTEGER NOT NULL
+);
+"""
+
+
+def _row(msg: discord.Message):
+    return (msg.id, msg.channel.id, str(msg.author), msg.content,
+            msg.created_at.strftime("%Y-%m-%d %H:%M:%S"))
+
+
+class MessageLog:
+    """
+    Local copy of ticket-channel messages, written from gateway events as they
+    happen so transcripts can be rendered without fetching history.
+    A channel is "live" once it has been caught up since this connection
+    started; from then on every event is captured and its watermark follows.
+    """
+
+    def __init__(self, path: str = DB_PATH):
+        self.path = path
+        self._conn = None
+        self.live = set()  # channel ids fully captured since the last (re)connect
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            self._conn = connect(self.path)
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    # ---------- Gateway events ----------
+    def on_connect(self):
+        """Fresh gateway session: anything may have been missed while we were away."""
+        self.live.clear()
+
+    def start_channel(self, channel_id: int):
+        """A brand new ticket channel has no history to catch up on."""
+        with self.conn:
+            self._set_watermark(channel_id, channel_id)
+        self.live.add(channel_id)
+
+    def add(self, msg: discord.Message):
+        with self.conn:
+            self.conn.execute("INSERT OR IGNORE INTO messages (id, channel_id, author, content, created_at) "
+                              "VALUES (?, ?, ?, ?, ?)", _row(msg))
+            if msg.channel.id in self.live:
+                self._set_watermark(msg.channel.id, msg.id)
+
+    def edit(self, message_id: int, content: str):
+        with self.conn:
+            self.conn.execute("UPDATE messages SET content = ?, edited = 1 WHERE id = ?", (content, message_id))
+
+    def delete(self, message_id: int):
+        with self.conn:
+            self.conn.execute("UPDATE messages SET deleted = 1 WHERE id = ?", (message_id,))
+
+    # ---------- Catch up ----------
+    def watermark(self, channel_id: int) -> int:
+        row = self.conn.execute("SELECT synced_through FROM capture_state WHERE channel_id = ?",
+                                (channel_id,)).fetchone()
+        return row[0] if row else 0
+
+    def _set_watermark(self, channel_id: int, message_id: int):
+        self.conn.execute(
+            "INSERT INTO capture_state (channel_id, synced_through) VALUES (?, ?) "
+            "ON CONFLICT (channel_id) DO UPDATE SET synced_through = MAX(synced_through, excluded.synced_through)",
+            (channel_id, message_id),
+        )
+
+    async def backfill(self, channel: discord.TextChannel) -> int:
+        """
+        Fetch only the messages after the watermark (none if the channel is live).
+        Other channels never go live, so each transcript catches them up again.
+        One page is read first; if the gap is longer than that, the rest of it,
+        up to the channel's last message, is fetched in parallel id windows.
+        Returns how many messages were fetched from Discord.
+        """
+        if channel.id in self.live:
+            return 0
+        after = self.watermark(channel.id)
+        history = channel.history(limit=PAGE_SIZE, after=discord.Object(id=after) if after else None,
+                                  oldest_first=True)
+        page = [msg async for msg in history]
+        fetched = self._store(channel.id, page)
+
+        last = channel.last_message_id
+        if len(page) == PAGE_SIZE and last and last > page[-1].id:
+            counter = [0]
+
+            def store(messages):
+                counter[0] += self._insert(messages)
+
+            def advance(message_id):
+                with self.conn:
+                    self._set_watermark(channel.id, message_id)
+
+            await fetch_range(channel, page[-1].id, last, store, advance)
+            fetched += counter[0]
+        if TICKETS.is_ticket(channel.id):  # only ticket channels are captured from events
+            self.live.add(channel.id)
+        return fetched
+
+    def _insert(self, messages) -> int:
+        if not messages:
+            return 0
+        with self.conn:
+            self.conn.executemany("INSERT OR IGNORE INTO messages (id, channel_id, author, content, created_at) "
+                                  "VALUES (?, ?, ?, ?, ?)", [_row(msg) for msg in messages])
+        return len(messages)
+
+    def _store(self, channel_id: int, messages) -> int:
+        """Insert a page of backfilled messages (oldest first) and move the watermark past it."""
+        if not messages:
+            return 0
+        count = self._insert(messages)
+        with self.conn:
+            self._set_watermark(channel_id, messages[-1].id)
+        return count
+
+    # ---------- Reading ----------
+    def rows(self, channel_id: int):
+        """Cursor over (created_at, author, content, edited, deleted), oldest first."""
+        return self.conn.execute(
+            "SELECT created_at, author, content, edited, deleted FROM messages "
+            "WHERE channel_id = ? ORDER BY id", (channel_id,))
+
+
+MESSAGE_LOG = MessageLog()
@@ -1,33 +1,50 @@
+import math
+
 import discord
-from discord.ui import View, Select, Modal, TextInput, Button
-from minigames_data import MINIGAMES_RATES
-from config import CATEGORY_TICKET_ID
+from discord.ui import View, Select, Modal, TextInput, Button, DynamicItem
+from catalog import ITEM_REF_RE, catalog_at, current_catalog, fmt_pkr, fmt_usd, fmt_pkr_total, fmt_usd_total, scale_minor
+from ticket_service import open_ticket
+from ticket_controls import TicketControlView
+from dispatch import ROUTER
+from jobs import defer_then_run
+from order_ledger import Order
+from instrumentation import instrumented
+
+MODAL_TIMEOUT = 600
+QTY_RE = r"[0-9.e+-]+"  # repr() of the quantity float
+EXPIRED = "⌛ This order has expired (prices changed). Please start again from the panel."
 
 
 # ---------------- Minigame Start ----------------
+# Selects and the order button are DynamicItems (state in the custom_id), so
+# nothing is kept per message and order buttons survive a restart.
 class MinigamesStartView(View):
     def __init__(self, user: discord.User):
         super().__init__(timeout=None)
         self.user = user
-        self.add_item(MinigameSelect(user))
+        self.add_item(MinigameSelect())
 
 
-class MinigameSelect(Select):
-    def __init__(self, user: discord.User):
-        self.user = user
-        games = sorted(set(name.split(" - ")[0] for name in MINIGAMES_RATES))
+class MinigameSelect(DynamicItem[Select], template=r"mg:game"):
+    def __init__(self):
+        games = list(current_catalog().minigames.groups)  # grouped and sorted at catalog load
         options = [
             discord.SelectOption(label=g, description=f"View methods for {g}")
             for g in games
         ]
-        super().__init__(placeholder="Select a minigame...", options=options)
+        super().__init__(Select(placeholder="Select a minigame...", options=options, custom_id="mg:game"))
+
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls()
 
+    @instrumented
     async def callback(self, interaction: discord.Interaction):
-        selected_game = self.values[0]
+        selected_game = self.item.values[0]
+        catalog = current_catalog()
         methods = {
-            k: v
-            for k, v in MINIGAMES_RATES.items()
-            if k.startswith(selected_game)
+            k: (pkr, usd)
+            for k, pkr, usd in catalog.minigames.items(catalog.minigames.groups.get(selected_game, ()))
         }
 
         embed = discord.Embed(
@@ -38,23 +55,14 @@ class MinigameSelect(Select):
 
         await interaction.response.edit_message(
             embed=embed,
-            view=MinigameMethodView(self.user, selected_game, methods),
+            view=MinigameMethodView(selected_game, methods, catalog),
         )
 
 
 # ---------------- Method Selection ----------------
 class MinigameMethodView(View):
-    def __init__(self, user: discord.User, game_name: str, methods: dict):
+    def __init__(self, game_name: str, methods: dict, catalog):
         super().__init__(timeout=None)
-        self.user = user
-        self.game_name = game_name
-        self.methods = methods
-        self.add_item(MinigameMethodSelect(user, game_name, methods))
-
-
-class MinigameMethodSelect(Select):
-    def __init__(self, user: discord.User, game_name: str, methods: dict):
-        self.user = user
         self.game_name = game_name
         self.methods = methods
 
@@ -63,21 +71,28 @@ class MinigameMethodSelect(Select):
             label = method.replace(f"{game_name} - ", "")
             options.append(
                 discord.SelectOption(
-                    label=label, description=f"{price_pkr} PKR ({price_usd})"
+                    label=label, value=catalog.minigames.ref(method),
+                    description=f"{fmt_pkr(price_pkr)} PKR ({fmt_usd(price_usd)})"
                 )
             )
+        self.add_item(MinigameMethodSelect(catalog, options))
 
-        super().__init__(placeholder="Choose method/item...", options=options)
 
-    async def callback(self, interaction: discord.Interaction):
-        method_label = self.values[0]
-        full_name = (
-            f"{self.game_name} - {method_label}"
-            if f"{self.game_name} - {method_label}" in self.methods
-            else method_label
-        )
+class MinigameMethodSelect(DynamicItem[Select], template=r"mg:method:(?P<version>\d+)"):
+    def __init__(self, catalog, options=()):
+        self.catalog = catalog
+        super().__init__(Select(placeholder="Choose method/item...", options=list(options),
+                                custom_id=f"mg:method:{catalog.version}"))
 
-        price_pkr, price_usd = self.methods.get(full_name, (0, "$0.00"))
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls(catalog_at(int(match["version"])) or current_catalog(), item.options)
+
+    @instrumented
+    async def callback(self, interaction: discord.Interaction):
+        minigames = self.catalog.minigames
+        full_name = minigames.resolve(self.item.values[0])
+        price_pkr, price_usd = minigames.price(full_name) if full_name else (0, 0)
         if price_pkr == 0:
             await interaction.response.send_message(
                 "❌ No price data found for this item.", ephemeral=True
@@ -85,18 +100,19 @@ class MinigameMethodSelect(Select):
             return
 
         await interaction.response.send_modal(
-            MinigameAmountModal(self.user, full_name, price_pkr, price_usd)
+            MinigameAmountModal(interaction.user, full_name, price_pkr, price_usd, self.catalog)
         )
 
 
 # ---------------- Quantity Modal ----------------
 class MinigameAmountModal(Modal):
-    def __init__(self, user: discord.User, method: str, price_pkr: float, price_usd: str):
-        super().__init__(title="Enter Quantity")
+    def __init__(self, user: discord.User, method: str, price_pkr: int, price_usd: int, catalog):
+        super().__init__(title="Enter Quantity", timeout=MODAL_TIMEOUT)
         self.user = user
         self.method = method
         self.price_pkr = price_pkr
         self.price_usd = price_usd
+        self.catalog = catalog
 
         self.quantity = TextInput(
             label="How many points/items?",
@@ -105,11 +121,14 @@ class MinigameAmountModal(Modal):
         )
         self.add_item(self.quantity)
 
+    @instrumented
     async def on_submit(self, interaction: discord.Interaction):
         try:
             qty = float(self.quantity.value)
-            total_pkr = self.price_pkr * qty
-            total_usd = float(self.price_usd.strip("$")) * qty
+            if not math.isfinite(qty) or qty <= 0:
+                raise ValueError("quantity must be a positive number")
+            total_pkr = scale_minor(self.price_pkr, qty)
+            total_usd = scale_minor(self.price_usd, qty)
         except Exception as e:
             await interaction.response.send_message(
                 f"❌ Error: {str(e)}", ephemeral=True
@@ -119,9 +138,9 @@ class MinigameAmountModal(Modal):
         embed = discord.Embed(
             title=f"🎮 {self.method}",
             description=(
-                f"**Unit Price:** {self.price_pkr} PKR ({self.price_usd})\n"
+                f"**Unit Price:** {fmt_pkr(self.price_pkr)} PKR ({fmt_usd(self.price_usd)})\n"
                 f"**Quantity:** {qty}\n\n"
-                f"💰 **Total:** {total_pkr:,.0f} PKR (${total_usd:,.2f} USD)"
+                f"💰 **Total:** {fmt_pkr_total(total_pkr)} PKR ({fmt_usd_total(total_usd)} USD)"
             ),
             color=discord.Color.gold(),
         )
@@ -129,158 +148,82 @@ class MinigameAmountModal(Modal):
 
         await interaction.response.send_message(
             embed=embed,
-            view=CreateTicketView(
-                self.user, self.method, qty, total_pkr, total_usd
-            ),
+            view=CreateTicketView(self.user, self.catalog, self.method, qty),
             ephemeral=True,
         )
 
 
 # ---------------- Ticket Creation ----------------
 class CreateTicketView(View):
-    def __init__(self, user: discord.User, method: str, qty: float, total_pkr: float, total_usd: float):
+    def __init__(self, user: discord.User, catalog, method: str, qty: float):
         super().__init__(timeout=None)
-        self.user = user
-        self.method = method
+        self.add_item(CreateTicketButton(user.id, catalog.version, catalog.minigames.ref(method), qty))
+
+
+class CreateTicketButton(
+    DynamicItem[Button],
+    template=rf"mg:order:(?P<owner>\d+):(?P<version>\d+):(?P<ref>{ITEM_REF_RE}):(?P<qty>{QTY_RE})",
+):
+    def __init__(self, owner_id: int, version: int, ref: str, qty: float):
+        super().__init__(Button(label="🎟 Create Ticket", style=discord.ButtonStyle.success,
+                                custom_id=f"mg:order:{owner_id}:{version}:{ref}:{qty!r}"))
+        self.owner_id = owner_id
+        self.version = version
+        self.ref = ref
         self.qty = qty
-        self.total_pkr = total_pkr
-        self.total_usd = total_usd
 
-    @discord.ui.button(label="🎟 Create Ticket", style=discord.ButtonStyle.success)
-    async def create_ticket(self, interaction: discord.Interaction, button: discord.ui.Button):
-        guild = interaction.guild
-        category = discord.utils.get(guild.categories, id=CATEGORY_TICKET_ID)
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls(int(match["owner"]), int(match["version"]), match["ref"], float(match["qty"]))
 
-        if not category:
-            category = await guild.create_category("Tickets")
+    @instrumented
+    async def callback(self, interaction: discord.Interaction):
+        if interaction.user.id != self.owner_id:
+            await interaction.response.send_message("This button is only for the user who requested the order.", ephemeral=True)
+            return
 
-        channel = await guild.create_text_channel(
-            name=f"ticket-{self.user.name.lower()}",
-            category=category,
-            topic=f"Minigame Order for {self.user.name}",
-        )
-        await channel.set_permissions(self.user, view_channel=True, send_messages=True)
+        catalog = catalog_at(self.version)  # None if these prices are no longer in the recent snapshots
+        method = catalog.minigames.resolve(self.ref) if catalog else None
+        if method is None:
+            await interaction.response.send_message(EXPIRED, ephemeral=True)
+            return
+        price_pkr, price_usd = catalog.minigames.price(method)
+        user = interaction.user
 
         embed = discord.Embed(
-            title=f"🎮 Minigame Order - {self.method}",
+            title=f"🎮 Minigame Order - {method}",
             description=(
-                f"**Customer:** {self.user.mention}\n"
+                f"**Customer:** {user.mention}\n"
                 f"**Quantity:** {self.qty}\n"
-                f"**Total:** {self.total_pkr:,.0f} PKR (${self.total_usd:,.2f})\n\n"
+                f"**Total:** {fmt_pkr_total(scale_minor(price_pkr, self.qty))} PKR "
+                f"({fmt_usd_total(scale_minor(price_usd, self.qty))})\n\n"
                 "Staff will contact you soon!"
             ),
             color=discord.Color.dark_gold(),
         )
+        embed.set_footer(text=f"Prices v{catalog.version}")
 
-        await channel.send(embed=embed, view=TicketControlView(self.user))
-        await interaction.response.send_message("✅ Ticket created successfully!", ephemeral=True)
-
-
-# ---------------- Ticket Controls ----------------
-class TicketControlView(View):
-    def __init__(self, owner: discord.Member):
-        super().__init__(timeout=None)
-        self.owner = owner
-        self.add_item(CloseButton(self.owner))
-
-
-class CloseButton(Button):
-    def __init__(self, owner: discord.Member):
-        super().__init__(label="🔒 Close Ticket", style=discord.ButtonStyle.red)
-        self.owner = owner
-
-    async def callback(self, interaction: discord.Interaction):
-        await interaction.response.send_message(
-            "Are you sure you want to close this ticket?",
-            view=CloseConfirmView(self.owner),
-            ephemeral=True
-        )
-
-
-class CloseConfirmView(View):
-    def __init__(self, owner: discord.Member):
-        super().__init__(timeout=20)
-        self.owner = owner
-
-    @discord.ui.button(label="✅ Yes", style=discord.ButtonStyle.green)
-    async def yes(self, interaction: discord.Interaction, button: discord.ui.Button):
-        await interaction.response.defer()  # ✅ tell Discord we're processing it
-        try:
-            await interaction.message.delete()
-        except discord.NotFound:
-            pass
-
-        await interaction.channel.set_permissions(self.owner, send_messages=False, view_channel=False)
-        await interaction.channel.edit(name=f"closed-{self.owner.name.lower()}")
-
-        embed = discord.Embed(
-            title="🎮 Ticket Closed",
-            description=f"Ticket closed by {interaction.user.mention}\nStaff options below:",
-            color=discord.Color.dark_gold(),
-        )
-
-        await interaction.channel.send(embed=embed, view=AfterCloseView(self.owner))
-
-    @discord.ui.button(label="❌ No", style=discord.ButtonStyle.gray)
-    async def no(self, interaction: discord.Interaction, button: discord.ui.Button):
-        await interaction.response.send_message("❌ Ticket closure cancelled.", ephemeral=True)
-
-
-class AfterCloseView(View):
-    def __init__(self, owner: discord.Member):
-        super().__init__(timeout=None)
-        self.owner = owner
-        self.add_item(ReopenButton(owner))
-        self.add_item(TranscriptButton())
-        self.add_item(DeleteButton())
-
-
-class ReopenButton(Button):
-    def __init__(self, owner: discord.Member):
-        super().__init__(label="🔓 Reopen Ticket", style=discord.ButtonStyle.green)
-        self.owner = owner
-
-    async def callback(self, interaction: discord.Interaction):
-        await interaction.channel.set_permissions(self.owner, view_channel=True, send_messages=True)
-        await interaction.channel.edit(name=f"ticket-{self.owner.name.lower()}")
-        await interaction.response.send_message("✅ Ticket reopened.", ephemeral=True)
-
-
-class TranscriptButton(Button):
-    def __init__(self):
-        super().__init__(label="📜 Transcript", style=discord.ButtonStyle.blurple)
-
-    async def callback(self, interaction: discord.Interaction):
-        messages = []
-        async for msg in interaction.channel.history(limit=None, oldest_first=True):
-            messages.append(f"[{msg.created_at}] {msg.author}: {msg.content}")
-
-        transcript_text = "\n".join(messages)
-        file = discord.File(fp=discord.utils._BytesIO(transcript_text.encode()), filename="transcript.txt")
-        await interaction.user.send(file=file)
-        await interaction.response.send_message("📜 Transcript sent to your DMs.", ephemeral=True)
-
-
-class DeleteButton(Button):
-    def __init__(self):
-        super().__init__(label="❌ Delete Ticket", style=discord.ButtonStyle.red)
-
-    async def callback(self, interaction: discord.Interaction):
-        await interaction.response.send_message(
-            "Are you sure you want to delete this ticket?",
-            view=ConfirmDeleteView(),
-            ephemeral=True
+        job = lambda: open_ticket(
+            interaction.guild,
+            user,
+            topic=f"Minigame Order for {user.name}: {method}",
+            embed=embed,
+            view=TicketControlView(user),
+            order=Order("minigames", user.id, None, (method,), self.qty,
+                        scale_minor(price_pkr, self.qty), scale_minor(price_usd, self.qty), catalog.version),
         )
+        await defer_then_run(interaction, job, lambda channel: f"✅ Ticket created: {channel.mention}")
 
 
-class ConfirmDeleteView(View):
-    def __init__(self):
-        super().__init__(timeout=20)
+DYNAMIC_ITEMS = (MinigameSelect, MinigameMethodSelect, CreateTicketButton)
 
-    @discord.ui.button(label="✅ Yes", style=discord.ButtonStyle.red)
-    async def yes(self, interaction: discord.Interaction, button: discord.ui.Button):
-        await interaction.channel.delete()
 
-    @discord.ui.button(label="❌ No", style=discord.ButtonStyle.gray)
-    async def no(self, interaction: discord.Interaction, button: discord.ui.Button):
-        await interaction.response.send_message("❌ Deletion canceled.", ephemeral=True)
+# ---------------- Panel entry ----------------
+@ROUTER.panel("btn_minigames", "🎮 Minigames", "Order minigame runs", position=3)
+async def open_minigames(interaction: discord.Interaction):
+    embed = discord.Embed(
+        title="🎮 Minigame Services",
+        description="Select a minigame to begin:",
+        color=discord.Color.dark_gold(),
+    )
+    await interaction.response.send_message(embed=embed, view=MinigamesStartView(interaction.user), ephemeral=True)
@@ -0,0 +1,168 @@
+# order_ledger.py
+import asyncio
+import atexit
+import json
+import logging
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from config import DB_PATH, ORDER_BATCH_SIZE, ORDER_FLUSH_SECONDS
+from metrics import Counter, Gauge, Histogram
+from storage import connect
+
+log = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS orders (
+    id               INTEGER PRIMARY KEY,
+    created_at       TEXT NOT NULL,     -- UTC, 'YYYY-MM-DD HH:MM:SS'
+    service          TEXT NOT NULL,     -- quest, leveling, bossing, minigames
+    customer_id      INTEGER NOT NULL,
+    rsn              TEXT,
+    items            TEXT NOT NULL,     -- JSON list of catalog item names
+    qty              REAL NOT NULL,     -- kills/points/items; XP gained for leveling; 1 for quests
+    pkr_minor        INTEGER NOT NULL,
+    usd_minor        INTEGER NOT NULL,
+    catalog_version  INTEGER NOT NULL,
+    channel_id       INTEGER            -- ticket channel
+);
+CREATE INDEX IF NOT EXISTS orders_by_time ON orders (created_at);
+CREATE INDEX IF NOT EXISTS orders_by_customer ON orders (customer_id, created_at);
+CREATE INDEX IF NOT EXISTS orders_by_channel ON orders (channel_id);
+"""
+
+ORDERS = Counter("orders_total", "Confirmed orders by service", ["service"])
+PENDING = Gauge("order_ledger_pending", "Orders waiting to be written")
+FLUSH_SECONDS = Histogram("order_ledger_flush_seconds", "Time to write one batch of orders")
+
+# pkr/usd in minor units (catalog.PKR_SCALE / USD_SCALE), channel_id filled in by open_ticket
+Order = namedtuple("Order", "service customer_id rsn items qty pkr usd catalog_version channel_id",
+                   defaults=(None,))
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _row(order: Order, created_at: str):
+    return (created_at, order.service, order.customer_id, order.rsn, json.dumps(list(order.items)),
+            order.qty, order.pkr, order.usd, order.catalog_version, order.channel_id)
+
+
+INSERT = ("INSERT INTO orders (created_at, service, customer_id, rsn, items, qty, pkr_minor, usd_minor, "
+          "catalog_version, channel_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)")
+
+
+class OrderLedger:
+    """
+    Structured record of every confirmed order, in the local SQLite database.
+    record() only appends to a buffer; a background task writes the buffer
+    in one transaction every ORDER_FLUSH_SECONDS (or once ORDER_BATCH_SIZE
+    rows are waiting) on its own thread, so order handlers never touch disk.
+    Reports read through a separate connection (WAL: readers don't block it).
+    """
+
+    def __init__(self, path: str = DB_PATH, batch_size: int = ORDER_BATCH_SIZE,
+                 flush_every: float = ORDER_FLUSH_SECONDS):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_every = flush_every
+        self._pending = []
+        self._wake = None
+        self._task = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="order-ledger")
+        self._writer_conn = None  # only used on the executor thread
+        self._conn = None
+        atexit.register(self.close)
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            self._conn = connect(self.path)
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    # ---------- Writing ----------
+    def record(self, order: Order):
+        """Queue one confirmed order. Never blocks."""
+        ORDERS.inc(service=order.service)
+        self._pending.append(_row(order, _now()))
+        PENDING.set(len(self._pending))
+        if self._task is None:
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._writer(), name="order-ledger")
+        if len(self._pending) >= self.batch_size:
+            self._wake.set()
+
+    async def _writer(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_every)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+    async def flush(self):
+        """Write everything queued so far."""
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        PENDING.set(0)
+        started = time.perf_counter()
+        try:
+            await asyncio.get_running_loop().run_in_executor(self._executor, self._write, batch)
+        except Exception:
+            log.exception("Order ledger: writing %d orders failed, will retry", len(batch))
+            self._pending[:0] = batch
+            PENDING.set(len(self._pending))
+            return
+        FLUSH_SECONDS.observe(time.perf_counter() - started)
+
+    def _write(self, rows):
+        if self._writer_conn is None:
+            self._writer_conn = connect(self.path)
+            self._writer_conn.executescript(SCHEMA)
+        with self._writer_conn:
+            self._writer_conn.executemany(INSERT, rows)
+
+    def close(self):
+        """Synchronously write whatever is still buffered (interpreter exit)."""
+        if self._pending:
+            batch, self._pending = self._pending, []
+            conn = connect(self.path)
+            try:
+                conn.executescript(SCHEMA)
+                with conn:
+                    conn.executemany(INSERT, batch)
+            finally:
+                conn.close()
+
+    # ---------- Reports ----------
+    def revenue(self, since: str = None, until: str = None):
+        """[(service, orders, pkr_minor, usd_minor)] between two 'YYYY-MM-DD[ HH:MM:SS]' UTC times."""
+        return self.conn.execute(
+            "SELECT service, COUNT(*), SUM(pkr_minor), SUM(usd_minor) FROM orders "
+            "WHERE created_at >= ? AND created_at < ? GROUP BY service ORDER BY SUM(pkr_minor) DESC",
+            (since or "", until or "9999"),
+        ).fetchall()
+
+    def customer_orders(self, customer_id: int, limit: int = 20):
+        """A customer's latest orders: [(created_at, service, items, qty, pkr_minor, usd_minor, channel_id)]."""
+        rows = self.conn.execute(
+            "SELECT created_at, service, items, qty, pkr_minor, usd_minor, channel_id FROM orders "
+            "WHERE customer_id = ? ORDER BY created_at DESC LIMIT ?", (customer_id, limit),
+        ).fetchall()
+        return [(c, s, json.loads(items), q, p, u, ch) for c, s, items, q, p, u, ch in rows]
+
+    def repeat_customers(self, min_orders: int = 2, limit: int = 20):
+        """[(customer_id, orders, pkr_minor)] for customers with at least `min_orders`, biggest spenders first."""
+        return self.conn.execute(
+            "SELECT customer_id, COUNT(*) AS n, SUM(pkr_minor) AS total FROM orders GROUP BY customer_id "
+            "HAVING n >= ? ORDER BY total DESC LIMIT ?", (min_orders, limit),
+        ).fetchall()
+
+
+ORDER_LEDGER = OrderLedger()
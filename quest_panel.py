@@ -1,35 +1,53 @@
 # quest_panel.py
 import discord
-import math
-import asyncio
-from config import (
-    CATEGORY_TICKET_ID,
-    ROLE_OWNER,
-    ROLE_MODERATOR,
-    ROLE_STAFF,
-    TICKET_PREFIX,
-)
-from quests_data import QUESTS
+from collections import namedtuple
+from ticket_service import open_ticket
+from ticket_controls import TicketControlView
+from dispatch import ROUTER
+from jobs import defer_then_run
+from instrumentation import instrumented
+from catalog import current_catalog, fmt_pkr, fmt_usd, fmt_usd_total
+from order_ledger import Order
+
 
 # ---------- Utilities ----------
-QUEST_NAMES = sorted(QUESTS.keys(), key=lambda s: s.lower())
+QUESTS_PER_PAGE = 25  # Discord's select option limit
+
+QuestPage = namedtuple("QuestPage", "ids id_set options")
+
 
+def calc_total(selected_names, catalog=None):
+    """(pkr_minor, usd_minor) for the selected quests, straight from the catalog snapshot."""
+    return (catalog or current_catalog()).quests.total(selected_names)
 
-def calc_total(selected_names):
-    total_pkr = 0
-    total_usd = 0.0
-    for name in selected_names:
-        pkr, usd = QUESTS.get(name, (0, 0.0))
-        if isinstance(usd, str):
-            usd = float(usd.replace("$", "").strip())
-        total_pkr += pkr
-        total_usd += usd
-    return total_pkr, round(total_usd, 2)
 
+def quest_pages(catalog) -> tuple:
+    """
+    The quest list cut into QuestPages (ids, id set, SelectOptions), built once
+    per catalog snapshot and cached on it. Options are shared between sessions:
+    never modify them, overlay selections with page_options() instead.
+    """
+    pages = catalog.cache.get("quest_pages")
+    if pages is None:
+        ids = catalog.quests.ids
+        pages = []
+        for start in range(0, max(len(ids), 1), QUESTS_PER_PAGE):
+            page_ids = ids[start:start + QUESTS_PER_PAGE]
+            options = tuple(
+                discord.SelectOption(label=name, description=f"PKR {fmt_pkr(pkr)} • USD {fmt_usd(usd)}")
+                for name, pkr, usd in catalog.quests.items(page_ids)
+            )
+            pages.append(QuestPage(page_ids, frozenset(page_ids), options))
+        pages = catalog.cache["quest_pages"] = tuple(pages)
+    return pages
 
-def is_staff(member: discord.Member):
-    return any(r.id in {ROLE_OWNER, ROLE_MODERATOR, ROLE_STAFF}
-               for r in member.roles)
+
+def page_options(page: QuestPage, selected) -> list:
+    """The page's cached options, with copies marked default=True for quests in `selected`."""
+    return [
+        discord.SelectOption(label=o.label, description=o.description, default=True) if o.label in selected else o
+        for o in page.options
+    ]
 
 
 # ---------- RSN Modal ----------
@@ -42,6 +60,7 @@ class RSNModal(discord.ui.Modal, title="Enter your RuneScape Name (RSN)"):
         super().__init__()
         self.user = user
 
+    @instrumented
     async def on_submit(self, interaction: discord.Interaction):
         view = QuestSelectionView(self.user, self.rsn.value)
         embed = discord.Embed(
@@ -71,38 +90,31 @@ class QuestSelectionView(discord.ui.View):
         super().__init__(timeout=timeout)
         self.user = user
         self.rsn = rsn
+        self.catalog = current_catalog()  # prices stay fixed for this session
+        self.pages = quest_pages(self.catalog)
         self.page = 0
-        self.per_page = 25
         self.selected = []
-        self._update_select_for_page()
+        self.select = QuestSelect(page_options(self.pages[0], ()))
+        self.select.callback = self.select_callback
+        self.add_item(self.select)
         self.add_item(PrevPageButton(self))
         self.add_item(NextPageButton(self))
         self.add_item(ConfirmOrderButton(self))
 
-    def _get_page_items(self):
-        start = self.page * self.per_page
-        return QUEST_NAMES[start:start + self.per_page]
-
     def _update_select_for_page(self):
-        for child in list(self.children):
-            if isinstance(child, discord.ui.Select):
-                self.remove_item(child)
-        page_items = self._get_page_items()
-        options = [
-            discord.SelectOption(label=name,
-                                 description=f"PKR {pkr} • USD {usd}")
-            for name, (pkr, usd) in QUESTS.items() if name in page_items
-        ]
-        select = QuestSelect(options)
-        select.callback = self.select_callback
-        self.add_item(select)
+        """Swap in the current page's cached options (selected quests pre-ticked)."""
+        page = self.pages[self.page]
+        selected = set(self.selected) & page.id_set
+        self.select.options = page_options(page, selected) if selected else list(page.options)
+        self.select.max_values = len(page.options)
 
+    @instrumented
     async def select_callback(self, interaction: discord.Interaction):
         values = interaction.data.get("values", []) if interaction.data else []
-        page_items = set(self._get_page_items())
+        page_items = self.pages[self.page].id_set
         self.selected = [s for s in self.selected if s not in page_items]
         self.selected.extend(values)
-        total_pkr, total_usd = calc_total(self.selected)
+        total_pkr, total_usd = calc_total(self.selected, self.catalog)
         embed = discord.Embed(title="Order Preview — Questing",
                               color=discord.Color.green())
         embed.add_field(name="RSN", value=self.rsn)
@@ -111,7 +123,7 @@ class QuestSelectionView(discord.ui.View):
                         if self.selected else "No quests selected",
                         inline=False)
         embed.add_field(name="Total Price",
-                        value=f"PKR {total_pkr} • USD {total_usd}")
+                        value=f"PKR {fmt_pkr(total_pkr)} • USD {fmt_usd_total(total_usd)}")
         embed.set_footer(text="Press Confirm Order when ready.")
         await interaction.response.edit_message(embed=embed, view=self)
 
@@ -133,6 +145,7 @@ class PrevPageButton(discord.ui.Button):
                          row=1)
         self.parent_view = view
 
+    @instrumented
     async def callback(self, interaction: discord.Interaction):
         if self.parent_view.page > 0:
             self.parent_view.page -= 1
@@ -150,9 +163,9 @@ class NextPageButton(discord.ui.Button):
                          row=1)
         self.parent_view = view
 
+    @instrumented
     async def callback(self, interaction: discord.Interaction):
-        max_page = math.ceil(len(QUEST_NAMES) / self.parent_view.per_page) - 1
-        if self.parent_view.page < max_page:
+        if self.parent_view.page < len(self.parent_view.pages) - 1:
             self.parent_view.page += 1
             self.parent_view._update_select_for_page()
             await interaction.response.edit_message(view=self.parent_view)
@@ -169,49 +182,15 @@ class ConfirmOrderButton(discord.ui.Button):
                          row=2)
         self.parent_view = parent_view
 
+    @instrumented
     async def callback(self, interaction: discord.Interaction):
         if not self.parent_view.selected:
             await interaction.response.send_message(
                 "Select at least one quest!", ephemeral=True)
             return
 
-        guild = interaction.guild
         author = interaction.user
-        ticket_name = f"{TICKET_PREFIX}-{author.name.lower()}"
-        existing = discord.utils.get(guild.text_channels, name=ticket_name)
-        counter = 1
-        while existing:
-            ticket_name = f"{TICKET_PREFIX}-{author.name.lower()}-{counter}"
-            existing = discord.utils.get(guild.text_channels, name=ticket_name)
-            counter += 1
-
-        overwrites = {
-            guild.default_role:
-            discord.PermissionOverwrite(view_channel=False),
-            author:
-            discord.PermissionOverwrite(view_channel=True,
-                                        send_messages=True,
-                                        read_messages=True),
-        }
-
-        verified_role = guild.get_role(1423395296917983444)
-        if verified_role:
-            overwrites[verified_role] = discord.PermissionOverwrite(
-                view_channel=False)
-
-        for role_id in (ROLE_OWNER, ROLE_MODERATOR, ROLE_STAFF):
-            role = guild.get_role(role_id)
-            if role:
-                overwrites[role] = discord.PermissionOverwrite(
-                    view_channel=True, send_messages=True, read_messages=True)
-
-        category = guild.get_channel(
-            CATEGORY_TICKET_ID) if CATEGORY_TICKET_ID else None
-        ticket = await guild.create_text_channel(name=ticket_name,
-                                                 overwrites=overwrites,
-                                                 category=category)
-
-        total_pkr, total_usd = calc_total(self.parent_view.selected)
+        total_pkr, total_usd = calc_total(self.parent_view.selected, self.parent_view.catalog)
         embed = discord.Embed(title="New Quest Order",
                               color=discord.Color.gold())
         embed.add_field(name="User", value=author.mention)
@@ -219,17 +198,27 @@ class ConfirmOrderButton(discord.ui.Button):
         embed.add_field(name="Quests",
                         value="\n".join(self.parent_view.selected))
         embed.add_field(name="Total",
-                        value=f"PKR {total_pkr} • USD {total_usd}")
+                        value=f"PKR {fmt_pkr(total_pkr)} • USD {fmt_usd_total(total_usd)}")
         embed.set_footer(
-            text="Staff: Use the buttons below to manage the ticket.")
-
-        from main import TicketControlView  # local import to avoid circular dependency
-        view = TicketControlView(author)
-        await ticket.send(
+            text=f"Staff: Use the buttons below to manage the ticket. • Prices v{self.parent_view.catalog.version}")
+
+        order = Order("quest", author.id, self.parent_view.rsn, tuple(self.parent_view.selected), 1,
+                      total_pkr, total_usd, self.parent_view.catalog.version)
+        job = lambda: open_ticket(
+            interaction.guild,
+            author,
+            topic=f"Quest order for {author.name} (RSN: {self.parent_view.rsn})",
+            embed=embed,
+            view=TicketControlView(author),
             content=
             f"{author.mention} — your ticket has been created. Staff will assist you shortly.",
-            embed=embed,
-            view=view,
+            order=order,
         )
-        await interaction.response.send_message(
-            f"Ticket created: {ticket.mention}", ephemeral=True)
+        # ack first; channel creation runs on the ticket worker pool
+        await defer_then_run(interaction, job, lambda ticket: f"Ticket created: {ticket.mention}")
+
+
+# ---------- Panel entry ----------
+@ROUTER.panel("btn_questing", "🧙 Questing", "Order quest completion services", position=1)
+async def open_questing(interaction: discord.Interaction):
+    await interaction.response.send_modal(RSNModal(interaction.user))
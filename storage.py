@@ -0,0 +1,12 @@
+# storage.py
+import sqlite3
+
+from config import DB_PATH
+
+
+def connect(path: str = DB_PATH) -> sqlite3.Connection:
+    """SQLite connection in WAL mode: readers never block the writer and commits are cheap."""
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
@@ -0,0 +1,138 @@
+# ticket_controls.py
+import asyncio
+
+import discord
+from discord.ui import View
+
+from config import TICKET_PREFIX
+from ticket_registry import CLOSED_PREFIX, retag
+from ticket_service import OWNER_OVERWRITE, is_staff
+from channel_writes import CHANNEL_WRITES
+from ticket_store import CLOSED, OPEN, TICKET_STORE
+from dispatch import ROUTER, RoutedButton, RoutedView, reply, route_arg, staff_only
+from instrumentation import instrumented
+from transcripts import export_transcript, describe
+
+# Ticket buttons are ROUTER routes: everything they need lives in the custom_id
+# ('ticket:close:<owner id>'), so they keep working after a restart and nothing
+# is kept per message.
+
+HIDDEN = discord.PermissionOverwrite(send_messages=False, view_channel=False)
+
+
+async def resolve_owner(guild: discord.Guild, owner_id: int):
+    """The ticket owner as a Member, or None if they left the server."""
+    member = guild.get_member(owner_id)
+    if member is None:
+        try:
+            member = await guild.fetch_member(owner_id)
+        except discord.HTTPException:
+            return None
+    return member
+
+
+async def close_ticket(channel: discord.TextChannel, owner_id: int, closed_by: str):
+    """Hide the ticket from its owner, queue the closed- rename and post the staff controls."""
+    owner = await resolve_owner(channel.guild, owner_id)
+    # queued, not awaited: renames are limited to two per 10 minutes per channel
+    if owner:
+        CHANNEL_WRITES.set_permissions(channel, owner, HIDDEN)
+    # keep the -N suffix: an owner's closed tickets must not share a name
+    CHANNEL_WRITES.rename(channel, retag(channel.name, CLOSED_PREFIX))
+    TICKET_STORE.set_status(channel.id, CLOSED)
+
+    embed = discord.Embed(
+        title="🎟 Ticket Closed",
+        description=f"Ticket closed by {closed_by}\nStaff options below:",
+        color=discord.Color.dark_grey(),
+    )
+    await channel.send(embed=embed, view=StaffAfterCloseView(owner_id))
+
+
+# ---------- Open ticket ----------
+def owner_or_staff(interaction: discord.Interaction):
+    """Check for ticket:close: the ticket owner or staff."""
+    if interaction.user.id == int(route_arg(interaction)) or is_staff(interaction.user):
+        return None
+    return "You don't have permission to close this ticket."
+
+
+@ROUTER.route("ticket:close", checks=(owner_or_staff,))
+async def close_clicked(interaction: discord.Interaction):
+    await reply(interaction, "Are you sure you want to close this ticket?",
+                view=ConfirmCloseView(int(route_arg(interaction))), ephemeral=True)
+
+
+class ConfirmCloseView(View):
+    """Short-lived ephemeral confirmation; expires on its own."""
+
+    def __init__(self, owner_id: int):
+        super().__init__(timeout=30)
+        self.owner_id = owner_id
+
+    @discord.ui.button(label="✅ Yes", style=discord.ButtonStyle.success)
+    @instrumented
+    async def confirm_yes(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await interaction.response.send_message(
+            "✅ Ticket has been closed. Only staff can view it now.", ephemeral=True
+        )
+        await close_ticket(interaction.channel, self.owner_id, interaction.user.mention)
+        self.stop()
+
+    @discord.ui.button(label="❌ No", style=discord.ButtonStyle.danger)
+    @instrumented
+    async def confirm_no(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await interaction.response.send_message("Ticket close cancelled.", ephemeral=True)
+        self.stop()
+
+
+# ---------- Closed ticket (staff) ----------
+@ROUTER.route("ticket:reopen", checks=(staff_only("Only staff can reopen tickets."),), defer=True)
+async def reopen_clicked(interaction: discord.Interaction):
+    owner = await resolve_owner(interaction.guild, int(route_arg(interaction)))  # may need a fetch
+    if owner is None:
+        await reply(interaction, "⚠️ The ticket owner is no longer in the server.", ephemeral=True)
+        return
+    CHANNEL_WRITES.set_permissions(interaction.channel, owner, OWNER_OVERWRITE)
+    CHANNEL_WRITES.rename(interaction.channel, retag(interaction.channel.name, TICKET_PREFIX))
+    TICKET_STORE.set_status(interaction.channel.id, OPEN)
+    delay = CHANNEL_WRITES.rename_delay(interaction.channel.id)
+    note = f" The channel will be renamed in about {delay / 60:.0f} min (Discord rename limit)." if delay else ""
+    await reply(interaction, f"🔓 Ticket reopened.{note}", ephemeral=True)
+
+
+@ROUTER.route("ticket:transcript", checks=(staff_only("Only staff can generate transcripts."),), defer=True)
+async def transcript_clicked(interaction: discord.Interaction):
+    file, stats = await export_transcript(interaction.channel)
+    try:
+        await interaction.user.send(file=file)
+    except discord.HTTPException:
+        await reply(interaction, "⚠️ Unable to DM transcript to you.", ephemeral=True)
+        return
+    await reply(interaction, f"🧾 Transcript sent to your DMs ({describe(stats)}).", ephemeral=True)
+
+
+@ROUTER.route("ticket:delete", checks=(staff_only("Only staff can delete tickets."),))
+async def delete_clicked(interaction: discord.Interaction):
+    await reply(interaction, "Deleting ticket in 3 seconds...", ephemeral=True)
+    await asyncio.sleep(3)
+    await interaction.channel.delete(reason=f"Deleted by {interaction.user}")
+
+
+# ---------- Views ----------
+class TicketControlView(RoutedView):
+    """Posted with every new ticket."""
+
+    def __init__(self, owner):
+        super().__init__(RoutedButton(label="🔒 Close Ticket", style=discord.ButtonStyle.secondary,
+                                      custom_id=f"ticket:close:{owner.id}"))
+
+
+class StaffAfterCloseView(RoutedView):
+    def __init__(self, owner_id: int):
+        super().__init__(
+            RoutedButton(label="🔓 Reopen Ticket", style=discord.ButtonStyle.primary,
+                         custom_id=f"ticket:reopen:{owner_id}"),
+            RoutedButton(label="🧾 Transcript", style=discord.ButtonStyle.secondary, custom_id="ticket:transcript"),
+            RoutedButton(label="❌ Delete Ticket", style=discord.ButtonStyle.danger, custom_id="ticket:delete"),
+        )
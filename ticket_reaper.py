@@ -0,0 +1,147 @@
+# ticket_reaper.py
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+
+import discord
+
+from config import (
+    REAPER_BATCH,
+    REAPER_INTERVAL,
+    REAPER_SPACING,
+    REAP_ADOPTED_TICKETS,
+    TICKET_CLOSED_RETENTION_HOURS,
+    TICKET_IDLE_CLOSE_HOURS,
+)
+from category_pool import CATEGORY_POOL
+from metrics import Counter, Gauge
+from ticket_controls import close_ticket
+from ticket_service import ticket_category
+from ticket_store import BOT, CLOSED, OPEN, TICKET_STORE
+from transcripts import export_transcript
+
+log = logging.getLogger(__name__)
+
+REAPED = Counter("tickets_reaped_total", "Tickets auto-closed or deleted by the reaper", ["action"])
+IDLE_TICKETS = Gauge("tickets_idle", "Tickets past their idle/retention limit at the last sweep", ["action"])
+
+
+def _epoch(stamp: str) -> float:
+    """'YYYY-MM-DD HH:MM:SS' (UTC, as stored in the ticket table) -> Unix time."""
+    return datetime.strptime(stamp, "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc).timestamp()
+
+
+class TicketReaper:
+    """
+    Closes tickets nobody has written in for TICKET_IDLE_CLOSE_HOURS and
+    deletes closed ones (after archiving the transcript) once they've been
+    closed and quiet for TICKET_CLOSED_RETENTION_HOURS.
+
+    Activity comes from an in-memory index fed by on_message and seeded at
+    startup from each channel's last_message_id snowflake, so nothing is ever
+    polled. Each sweep handles at most REAPER_BATCH tickets, oldest first,
+    REAPER_SPACING seconds apart; renames also go through CHANNEL_WRITES.
+
+    Only tickets the bot opened itself, still in a ticket category, are
+    touched; adopted ones (see TicketStore.reconcile) only with `adopted=True`.
+    """
+
+    def __init__(self, idle_close: float = TICKET_IDLE_CLOSE_HOURS * 3600,
+                 retention: float = TICKET_CLOSED_RETENTION_HOURS * 3600, adopted: bool = REAP_ADOPTED_TICKETS):
+        self.idle_close = idle_close
+        self.retention = retention
+        self.adopted = adopted
+        self.last_activity = {}  # channel_id -> Unix time of the last message (or creation)
+        self._task = None
+
+    # ---------- Activity index ----------
+    def touch(self, channel_id: int, when: float = None):
+        self.last_activity[channel_id] = when or time.time()
+
+    def forget(self, channel_id: int):
+        self.last_activity.pop(channel_id, None)
+
+    def seed(self, guild: discord.Guild, registry):
+        """Last activity of every ticket in `guild` from cached channel data (no REST)."""
+        # by channel id: registry.names keeps one channel per name
+        for channel_id in registry.owners:
+            channel = guild.get_channel(channel_id)
+            if channel is None or channel_id in self.last_activity:
+                continue
+            last = channel.last_message_id
+            when = discord.utils.snowflake_time(last) if last else channel.created_at
+            self.last_activity[channel_id] = when.timestamp()
+
+    # ---------- Sweeps ----------
+    def due(self, now: float = None):
+        """([channel ids to close], [channel ids to delete]), longest idle first."""
+        now = now or time.time()
+        close, delete = [], []
+        for channel_id, record in TICKET_STORE.records.items():
+            if record.source != BOT and not self.adopted:
+                continue
+            last = self.last_activity.get(channel_id)
+            if last is None:
+                continue  # not seen since startup (other guild / not yet seeded)
+            idle = now - last
+            if record.status == OPEN and idle > self.idle_close:
+                close.append((idle, channel_id))
+            elif (record.status == CLOSED and idle > self.retention
+                  and now - _epoch(record.closed_at or record.opened_at) > self.retention):
+                delete.append((idle, channel_id))
+        IDLE_TICKETS.set(len(close), action="close")
+        IDLE_TICKETS.set(len(delete), action="delete")
+        return [c for _, c in sorted(close, reverse=True)], [c for _, c in sorted(delete, reverse=True)]
+
+    async def sweep(self, bot):
+        close, delete = self.due()
+        work = [(close_ticket_idle, c) for c in close] + [(delete_ticket, c) for c in delete]
+        done = 0
+        for action, channel_id in work:
+            if done == REAPER_BATCH:
+                break
+            channel = bot.get_channel(channel_id)
+            if channel is None:
+                TICKET_STORE.forget(channel_id)
+                self.forget(channel_id)
+                continue
+            if not CATEGORY_POOL.is_ticket_category(ticket_category(channel.guild), channel.category):
+                continue  # moved out of the ticket categories: staff are keeping it
+            done += 1
+            try:
+                await action(self, channel)
+            except discord.HTTPException as e:
+                log.warning("Reaper: %s failed for #%s: %s", action.__name__, channel.name, e)
+            await asyncio.sleep(REAPER_SPACING)
+
+    async def run(self, bot):
+        while True:
+            await asyncio.sleep(REAPER_INTERVAL)
+            try:
+                await self.sweep(bot)
+            except Exception:
+                log.exception("Reaper sweep failed")
+
+    def start(self, bot):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run(bot), name="ticket-reaper")
+
+
+async def close_ticket_idle(reaper: TicketReaper, channel: discord.TextChannel):
+    record = TICKET_STORE.get(channel.id)
+    hours = reaper.idle_close / 3600
+    await close_ticket(channel, record.owner_id, f"the bot (no activity for {hours:.0f} h)")
+    reaper.touch(channel.id)  # retention counts from the close
+    REAPED.inc(action="close")
+
+
+async def delete_ticket(reaper: TicketReaper, channel: discord.TextChannel):
+    await export_transcript(channel)  # archived in the transcript index, searchable with /ticket-search
+    await channel.delete(reason="Closed ticket past retention")
+    TICKET_STORE.forget(channel.id)
+    reaper.forget(channel.id)
+    REAPED.inc(action="delete")
+
+
+TICKET_REAPER = TicketReaper()
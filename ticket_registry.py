@@ -0,0 +1,133 @@
+# ticket_registry.py
+import re
+
+import discord
+from config import TICKET_PREFIX
+
+CLOSED_PREFIX = "closed"
+# ticket-name, ticket-name-3, closed-name
+TICKET_NAME_RE = re.compile(rf"^(?:{re.escape(TICKET_PREFIX)}|{CLOSED_PREFIX})-(.+?)(?:-(\d+))?$")
+
+
+def ticket_base(user) -> str:
+    """Base channel name for a user's tickets, e.g. 'ticket-runescaper'."""
+    return f"{TICKET_PREFIX}-{user.name.lower()}"
+
+
+def retag(name: str, prefix: str) -> str:
+    """'ticket-runescaper-2' -> 'closed-runescaper-2': same owner part and suffix, new prefix."""
+    m = TICKET_NAME_RE.match(name)
+    return f"{prefix}-{m.group(1)}{f'-{m.group(2)}' if m.group(2) else ''}" if m else f"{prefix}-{name}"
+
+
+def guess_owner(channel: discord.TextChannel):
+    """The member a ticket channel was opened for: the only member in its overwrites."""
+    for target in channel.overwrites:
+        if isinstance(target, discord.Member) and not target.bot:
+            return target.id
+    return None
+
+
+class TicketRegistry:
+    """
+    In-memory index of ticket channels, so picking a free name never scans
+    guild.text_channels. Rebuilt once per guild on startup and kept current
+    from the channel create/delete/update gateway events. Name counters are
+    persisted by the caller (TicketStore.save_counter) and handed back to
+    rebuild(), so a suffix whose channel was deleted is never reused.
+    """
+
+    def __init__(self):
+        self.names = {}     # guild_id -> {channel name: channel_id (None while being created)}
+        self.owners = {}    # channel_id -> owner_id
+        self.by_owner = {}  # owner_id -> set of channel_ids
+        self.counters = {}  # (guild_id, base name) -> next numeric suffix
+
+    # ---------- Queries ----------
+    def is_ticket(self, channel_id: int) -> bool:
+        return channel_id in self.owners
+
+    def owner_of(self, channel_id: int):
+        return self.owners.get(channel_id)
+
+    def tickets_of(self, owner_id: int):
+        return self.by_owner.get(owner_id, set())
+
+    # ---------- Naming ----------
+    def next_suffix(self, guild_id: int, base: str) -> int:
+        return self.counters.get((guild_id, base), 1)
+
+    def allocate_name(self, guild: discord.Guild, user) -> str:
+        """
+        Reserve a free ticket name for `user`: 'ticket-name' first, then
+        'ticket-name-1', '-2', ... from a per-user counter that only moves forward.
+        """
+        names = self.names.setdefault(guild.id, {})
+        base = ticket_base(user)
+        name = base
+        if name in names:
+            key = (guild.id, base)
+            n = self.counters.get(key, 1)
+            while f"{base}-{n}" in names:
+                n += 1
+            name = f"{base}-{n}"
+            self.counters[key] = n + 1
+        names[name] = None  # reserved until the create event arrives
+        return name
+
+    def release_name(self, guild_id: int, name: str):
+        """Drop a reservation whose channel was never created."""
+        names = self.names.get(guild_id, {})
+        if name in names and names[name] is None:
+            del names[name]
+
+    # ---------- Updates ----------
+    def add(self, channel: discord.abc.GuildChannel, owner_id=None):
+        if not isinstance(channel, discord.TextChannel):
+            return
+        m = TICKET_NAME_RE.match(channel.name)
+        if not m:
+            return
+        self.names.setdefault(channel.guild.id, {})[channel.name] = channel.id
+        if m.group(2):
+            key = (channel.guild.id, f"{TICKET_PREFIX}-{m.group(1)}")
+            self.counters[key] = max(self.counters.get(key, 1), int(m.group(2)) + 1)
+        owner_id = owner_id or self.owners.get(channel.id) or guess_owner(channel)
+        if owner_id:
+            self.owners[channel.id] = owner_id
+            self.by_owner.setdefault(owner_id, set()).add(channel.id)
+
+    def remove(self, channel: discord.abc.GuildChannel):
+        names = self.names.get(channel.guild.id, {})
+        if names.get(channel.name) == channel.id:
+            del names[channel.name]
+        owner_id = self.owners.pop(channel.id, None)
+        if owner_id is not None:
+            self.by_owner.get(owner_id, set()).discard(channel.id)
+            if not self.by_owner.get(owner_id):
+                self.by_owner.pop(owner_id, None)
+
+    def rename(self, before: discord.abc.GuildChannel, after: discord.abc.GuildChannel):
+        if before.name == after.name:
+            return
+        owner_id = self.owners.get(before.id)
+        self.remove(before)
+        self.add(after, owner_id)
+
+    def rebuild(self, guild: discord.Guild, owners=None, counters=None):
+        """
+        Index every ticket channel of `guild` (one pass, on startup). `owners`
+        ({channel_id: owner_id}, from the ticket table) spares the overwrite scan;
+        `counters` ({(guild_id, base): next suffix}, persisted) keep suffixes of
+        channels deleted while the bot was down from being handed out again.
+        """
+        owners = owners or {}
+        self.names[guild.id] = {}
+        for channel in guild.text_channels:
+            self.add(channel, owners.get(channel.id))
+        for key, n in (counters or {}).items():
+            if key[0] == guild.id:
+                self.counters[key] = max(self.counters.get(key, 1), n)
+
+
+TICKETS = TicketRegistry()
@@ -0,0 +1,93 @@
+# ticket_service.py
+import logging
+
+import discord
+from config import CATEGORY_TICKET_ID, ROLE_OWNER, ROLE_MODERATOR, ROLE_STAFF, ROLE_VERIFIED
+from ticket_registry import TICKETS, ticket_base
+from jobs import with_retries
+from order_ledger import ORDER_LEDGER
+from ticket_store import BOT, TICKET_STORE
+from category_pool import CATEGORY_POOL
+
+log = logging.getLogger(__name__)
+
+STAFF_ROLE_IDS = (ROLE_OWNER, ROLE_MODERATOR, ROLE_STAFF)
+OWNER_OVERWRITE = discord.PermissionOverwrite(view_channel=True, send_messages=True)
+
+# guild_id -> (category, {role: overwrite}), built on first ticket
+_templates = {}
+
+
+def is_staff(member) -> bool:
+    return any(r.id in STAFF_ROLE_IDS for r in getattr(member, "roles", ()))
+
+
+# ---------- Per-guild template ----------
+def ticket_category(guild: discord.Guild):
+    """Configured ticket category, else an existing 'Tickets' category, else none."""
+    category = guild.get_channel(CATEGORY_TICKET_ID) if CATEGORY_TICKET_ID else None
+    if isinstance(category, discord.CategoryChannel):
+        return category
+    return discord.utils.get(guild.categories, name="Tickets")
+
+
+def guild_template(guild: discord.Guild):
+    """(category, overwrites) shared by every ticket in `guild`, cached until forget_guild()."""
+    template = _templates.get(guild.id)
+    if template is None:
+        overwrites = {guild.default_role: discord.PermissionOverwrite(view_channel=False)}
+        verified = guild.get_role(ROLE_VERIFIED)
+        if verified:
+            overwrites[verified] = discord.PermissionOverwrite(view_channel=False)
+        for role_id in STAFF_ROLE_IDS:
+            role = guild.get_role(role_id)
+            if role:
+                overwrites[role] = discord.PermissionOverwrite(view_channel=True, send_messages=True)
+        template = _templates[guild.id] = (ticket_category(guild), overwrites)
+    return template
+
+
+def forget_guild(guild_id: int):
+    """Drop the cached template (roles or the ticket category changed)."""
+    _templates.pop(guild_id, None)
+
+
+# ---------- Ticket creation ----------
+async def open_ticket(guild: discord.Guild, owner, *, topic: str, embed: discord.Embed, view=None, content=None,
+                      order=None):
+    """
+    Create a ticket channel for `owner` and post the order embed in it.
+    Overwrites, category and topic go out in the single create call, so a
+    ticket costs two REST requests: create channel + send message. Neither is
+    retried unless Discord refused it with a 429 (a timeout or 5xx may still
+    have gone through). Once the channel exists it is returned even if the
+    order message failed, so the customer is sent to it instead of retrying.
+    The category comes from CATEGORY_POOL (overflow / per-service categories).
+    `order` (an order_ledger.Order) is written to the ledger once the ticket exists.
+    """
+    base, template = guild_template(guild)
+    overwrites = dict(template)
+    overwrites[owner] = OWNER_OVERWRITE
+
+    category = await CATEGORY_POOL.acquire(guild, base, order.service if order is not None else None)
+    name = TICKETS.allocate_name(guild, owner)
+    base_name = ticket_base(owner)
+    TICKET_STORE.save_counter(guild.id, base_name, TICKETS.next_suffix(guild.id, base_name))
+    try:
+        channel = await guild.create_text_channel(name=name, category=category, overwrites=overwrites,
+                                                  topic=topic[:1024])
+    except Exception:
+        TICKETS.release_name(guild.id, name)
+        raise
+    finally:
+        CATEGORY_POOL.release(category)
+    TICKETS.add(channel, owner.id)
+    TICKET_STORE.opened(channel, owner.id, source=BOT)
+
+    try:
+        await with_retries(channel.send, content=content, embed=embed, view=view)
+    except Exception:
+        log.exception("Ticket #%s was created but its order message failed", channel.name)
+    if order is not None:
+        ORDER_LEDGER.record(order._replace(channel_id=channel.id))
+    return channel
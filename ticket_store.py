@@ -0,0 +1,136 @@
+# ticket_store.py
+from collections import namedtuple
+from datetime import datetime, timezone
+
+import discord
+
+from config import DB_PATH
+from storage import connect
+from ticket_registry import CLOSED_PREFIX
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tickets (
+    channel_id  INTEGER PRIMARY KEY,
+    guild_id    INTEGER NOT NULL,
+    owner_id    INTEGER NOT NULL,
+    status      TEXT NOT NULL DEFAULT 'open',  -- open, closed
+    opened_at   TEXT NOT NULL,
+    closed_at   TEXT,
+    source      TEXT NOT NULL DEFAULT 'adopted'  -- bot (open_ticket), adopted (found at startup)
+);
+CREATE INDEX IF NOT EXISTS tickets_by_owner ON tickets (owner_id);
+
+-- next ticket-name suffix per user, so a suffix is never handed out twice
+CREATE TABLE IF NOT EXISTS ticket_counters (
+    guild_id    INTEGER NOT NULL,
+    base        TEXT NOT NULL,     -- 'ticket-runescaper'
+    next        INTEGER NOT NULL,
+    PRIMARY KEY (guild_id, base)
+);
+"""
+
+OPEN, CLOSED = "open", "closed"
+BOT, ADOPTED = "bot", "adopted"
+
+TicketRecord = namedtuple("TicketRecord", "channel_id guild_id owner_id status opened_at closed_at source")
+
+
+def _stamp(when: datetime = None) -> str:
+    return (when or datetime.now(timezone.utc)).strftime("%Y-%m-%d %H:%M:%S")
+
+
+class TicketStore:
+    """
+    Durable ticket table (owner and open/closed per channel) next to the message
+    log. Loaded in one query at startup so the registry knows every owner,
+    including closed tickets and owners who left, without scanning overwrites.
+    The rows are mirrored in `records` and kept current by the ticket buttons.
+    """
+
+    def __init__(self, path: str = DB_PATH):
+        self.path = path
+        self._conn = None
+        self.records = {}  # channel_id -> TicketRecord
+        self.counters = {}  # (guild_id, base name) -> next suffix
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            self._conn = connect(self.path)
+            self._conn.executescript(SCHEMA)
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(tickets)")}
+            if "source" not in columns:  # table from before sources were recorded
+                with self._conn:
+                    self._conn.execute("ALTER TABLE tickets ADD COLUMN source TEXT NOT NULL DEFAULT 'adopted'")
+        return self._conn
+
+    def load(self) -> dict:
+        """Every known ticket, by channel id (name counters are loaded alongside)."""
+        rows = self.conn.execute(
+            "SELECT channel_id, guild_id, owner_id, status, opened_at, closed_at, source FROM tickets").fetchall()
+        self.records = {row[0]: TicketRecord(*row) for row in rows}
+        self.counters = {(g, base): n for g, base, n in
+                         self.conn.execute("SELECT guild_id, base, next FROM ticket_counters")}
+        return self.records
+
+    def owners(self) -> dict:
+        return {channel_id: r.owner_id for channel_id, r in self.records.items()}
+
+    def get(self, channel_id: int):
+        return self.records.get(channel_id)
+
+    # ---------- Updates ----------
+    def opened(self, channel: discord.TextChannel, owner_id: int, when: datetime = None, status: str = OPEN,
+               source: str = ADOPTED):
+        """Record a ticket. Only ticket_service.open_ticket passes source=BOT."""
+        record = TicketRecord(channel.id, channel.guild.id, owner_id, status, _stamp(when), None, source)
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO tickets (channel_id, guild_id, owner_id, status, opened_at, closed_at, source) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", record)
+        self.records[channel.id] = record
+
+    def save_counter(self, guild_id: int, base: str, next_suffix: int):
+        """Persist a registry name counter; it only ever moves forward."""
+        if self.counters.get((guild_id, base), 1) >= next_suffix:
+            return
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO ticket_counters (guild_id, base, next) VALUES (?, ?, ?) "
+                "ON CONFLICT (guild_id, base) DO UPDATE SET next = MAX(next, excluded.next)",
+                (guild_id, base, next_suffix))
+        self.counters[(guild_id, base)] = next_suffix
+
+    def set_status(self, channel_id: int, status: str):
+        record = self.records.get(channel_id)
+        if record is None or record.status == status:
+            return
+        closed_at = _stamp() if status == CLOSED else None
+        with self.conn:
+            self.conn.execute("UPDATE tickets SET status = ?, closed_at = ? WHERE channel_id = ?",
+                              (status, closed_at, channel_id))
+        self.records[channel_id] = record._replace(status=status, closed_at=closed_at)
+
+    def forget(self, channel_id: int):
+        if self.records.pop(channel_id, None) is not None:
+            with self.conn:
+                self.conn.execute("DELETE FROM tickets WHERE channel_id = ?", (channel_id,))
+
+    def reconcile(self, guild: discord.Guild, registry):
+        """
+        After registry.rebuild(guild): adopt ticket channels the table doesn't
+        have yet (opened before it existed, or lookalikes the bot never made)
+        and drop rows whose channel was deleted while the bot was offline.
+        Adopted rows are tracked but left alone by the reaper.
+        """
+        # by channel id: registry.names keeps one channel per name
+        for channel_id, owner_id in list(registry.owners.items()):
+            channel = guild.get_channel(channel_id)
+            if channel is not None and channel_id not in self.records:
+                status = CLOSED if channel.name.startswith(f"{CLOSED_PREFIX}-") else OPEN
+                self.opened(channel, owner_id, channel.created_at, status)
+        for channel_id in [c for c, r in self.records.items() if r.guild_id == guild.id and not guild.get_channel(c)]:
+            self.forget(channel_id)
+
+
+TICKET_STORE = TicketStore()
@@ -0,0 +1,154 @@
+# transcript_index.py
+import re
+from collections import namedtuple
+from datetime import datetime, timezone
+
+import discord
+
+from instrumentation import instrumented
+from message_log import MESSAGE_LOG
+from ticket_registry import TICKETS
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transcripts (
+    channel_id     INTEGER PRIMARY KEY,
+    channel_name   TEXT NOT NULL,
+    customer_id    INTEGER,
+    customer_name  TEXT NOT NULL DEFAULT '',
+    archived_at    TEXT NOT NULL,
+    messages       INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS transcripts_by_customer ON transcripts (customer_id, archived_at);
+
+-- rowid = ticket channel id
+CREATE VIRTUAL TABLE IF NOT EXISTS transcript_fts USING fts5 (
+    channel_name, customer, body, tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+SearchHit = namedtuple("SearchHit", "channel_id channel_name customer_id customer_name archived_at snippet")
+
+TERM_RE = re.compile(r"\w[\w'.-]*", re.UNICODE)
+
+
+def fts_query(text: str) -> str:
+    """
+    Turn free text into a safe FTS5 query: every word must match, the last
+    one as a prefix ('zulr' finds 'Zulrah'). Returns '' if there are no words.
+    """
+    terms = ['"' + t.replace('"', '""') + '"' for t in TERM_RE.findall(text)]
+    if not terms:
+        return ""
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+class TranscriptIndex:
+    """Full-text index of archived ticket transcripts, stored next to the message log."""
+
+    def __init__(self, log=MESSAGE_LOG):
+        self.log = log
+        self._ready = False
+
+    @property
+    def conn(self):
+        conn = self.log.conn  # same database: the body is built from `messages` inside SQLite
+        if not self._ready:
+            conn.executescript(SCHEMA)
+            self._ready = True
+        return conn
+
+    def archive(self, channel: discord.TextChannel, messages: int):
+        """(Re)index a ticket's transcript with its customer and archive date."""
+        owner_id = TICKETS.owner_of(channel.id)
+        owner = channel.guild.get_member(owner_id) if owner_id else None
+        customer = str(owner) if owner else ""
+        now = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M")
+        with self.conn as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO transcripts (channel_id, channel_name, customer_id, customer_name, archived_at, messages) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (channel.id, channel.name, owner_id, customer, now, messages),
+            )
+            conn.execute("DELETE FROM transcript_fts WHERE rowid = ?", (channel.id,))
+            conn.execute(
+                "INSERT INTO transcript_fts (rowid, channel_name, customer, body) "
+                "SELECT ?, ?, ?, coalesce(group_concat(author || ': ' || content, char(10)), '') "
+                "FROM (SELECT author, content FROM messages WHERE channel_id = ? ORDER BY id)",
+                (channel.id, channel.name, customer, channel.id),
+            )
+
+    def search(self, text: str, *, customer_id=None, limit: int = 5, offset: int = 0):
+        """(total_hits, [SearchHit]) ranked by bm25, best first."""
+        query = fts_query(text)
+        if not query:
+            return 0, []
+        where = "transcript_fts MATCH ?"
+        params = [query]
+        if customer_id:
+            where += " AND t.customer_id = ?"
+            params.append(customer_id)
+        base = f"FROM transcript_fts JOIN transcripts t ON t.channel_id = transcript_fts.rowid WHERE {where}"
+        total = self.conn.execute(f"SELECT count(*) {base}", params).fetchone()[0]
+        rows = self.conn.execute(
+            f"SELECT t.channel_id, t.channel_name, t.customer_id, t.customer_name, t.archived_at, "
+            f"snippet(transcript_fts, 2, '**', '**', '…', 16) {base} "
+            f"ORDER BY bm25(transcript_fts) LIMIT ? OFFSET ?",
+            params + [limit, offset],
+        ).fetchall()
+        return total, [SearchHit(*row) for row in rows]
+
+
+TRANSCRIPT_INDEX = TranscriptIndex()
+
+
+# ---------- /ticket-search results ----------
+class SearchResultsView(discord.ui.View):
+    """Paginated, ephemeral result list for one search (buttons expire with the view)."""
+
+    per_page = 5
+
+    def __init__(self, user: discord.User, text: str, customer_id=None):
+        super().__init__(timeout=300)
+        self.user = user
+        self.text = text
+        self.customer_id = customer_id
+        self.page = 0
+        self.total = 0
+
+    def render(self) -> discord.Embed:
+        self.total, hits = TRANSCRIPT_INDEX.search(
+            self.text, customer_id=self.customer_id, limit=self.per_page, offset=self.page * self.per_page
+        )
+        pages = max((self.total + self.per_page - 1) // self.per_page, 1)
+        embed = discord.Embed(
+            title=f"🔎 Ticket search: {self.text}"[:256],
+            description=None if hits else "No archived tickets match.",
+            color=discord.Color.blurple(),
+        )
+        for hit in hits:
+            who = f"<@{hit.customer_id}>" if hit.customer_id else (hit.customer_name or "unknown")
+            embed.add_field(
+                name=f"#{hit.channel_name} • {hit.archived_at}"[:256],
+                value=f"{who}\n{hit.snippet}"[:1024],
+                inline=False,
+            )
+        embed.set_footer(text=f"{self.total:,} hits • page {self.page + 1}/{pages}")
+        self.prev_page.disabled = self.page == 0
+        self.next_page.disabled = self.page + 1 >= pages
+        return embed
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        return interaction.user.id == self.user.id
+
+    @discord.ui.button(label="◀ Prev", style=discord.ButtonStyle.secondary)
+    @instrumented
+    async def prev_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page = max(self.page - 1, 0)
+        await interaction.response.edit_message(embed=self.render(), view=self)
+
+    @discord.ui.button(label="Next ▶", style=discord.ButtonStyle.secondary)
+    @instrumented
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page += 1
+        await interaction.response.edit_message(embed=self.render(), view=self)
@@ -0,0 +1,34 @@
+# xp_table.py
+from bisect import bisect_right
+
+MAX_LEVEL = 99
+MAX_XP = 200_000_000  # skill XP cap
+
+
+# ---------- Table ----------
+def _build_xp_table():
+    """XP needed for each level (index = level), using the in-game OSRS formula."""
+    table = [0, 0]  # index 0 unused, level 1 starts at 0 XP
+    points = 0
+    for lvl in range(1, MAX_LEVEL):
+        points += int(lvl + 300 * 2 ** (lvl / 7.0))
+        table.append(points // 4)
+    return tuple(table)
+
+
+# Built once at import and never mutated: XP_TABLE[70] == 737627
+XP_TABLE = _build_xp_table()
+_THRESHOLDS = XP_TABLE[1:]  # sorted XP thresholds for levels 1..99
+
+
+# ---------- Lookups ----------
+def xp_to_level(xp: int) -> int:
+    """OSRS level for a given amount of XP (1..99), O(log n) via bisect."""
+    return min(max(bisect_right(_THRESHOLDS, xp), 1), MAX_LEVEL)
+
+
+def level_to_xp(level: int) -> int:
+    """XP required to reach `level`. Raises ValueError outside 1..99."""
+    if not 1 <= level <= MAX_LEVEL:
+        raise ValueError(f"level must be between 1 and {MAX_LEVEL}")
+    return XP_TABLE[level]